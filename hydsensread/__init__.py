@@ -9,7 +9,7 @@
 
 from .file_reader import (
     SolinstFileReader, DATCampbellCRFileReader,  XLSHannaFileReader,
-    XSLMaxxamFileReader)
+    XSLMaxxamFileReader, DATCampbellTOB1FileReader)
 from .file_reader.web_page_reader.gnb_core_samples_web_scraper import GNBCoreSamplesDataFactory
 from .file_reader.web_page_reader.gnb_core_samples_web_scraper import GNBCoreSamplesListWebScrapper
 from .file_reader.web_page_reader.gnb_core_samples_web_scraper import GNBCoreSamplesNTSMapSearchWebScrapper
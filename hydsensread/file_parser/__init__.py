@@ -6,3 +6,6 @@ __description__ = " "
 __version__ = '1.0'
 
 from .concrete_file_parser import CSVFileParser, EXCELFileParser, TXTFileParser, WEBFileParser, XMLFileParser
+from .datetime_parser import (
+    infer_datetime_format, parse_date_components, parse_datetime_columns,
+    xldates_as_datetime64)
@@ -26,6 +26,13 @@ class AbstractFileParser(object, metaclass=ABCMeta):
     def read_file(self):
         pass
 
+    def close(self):
+        """
+        Release the resources, like an opened file, held by the parser once
+        the needed content was read. Nothing is held by default.
+        """
+        pass
+
     @property
     def get_file_content(self) -> typing.Union[bs4.BeautifulSoup, list]:
         return self._file_content
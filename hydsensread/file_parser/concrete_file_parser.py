@@ -7,49 +7,115 @@ __description__ = " "
 __version__ = '1.0'
 
 import csv
+import functools
+import itertools
 import re
 import warnings
 import xml.etree.ElementTree as ET
 from collections import OrderedDict
+from collections.abc import Mapping
 
 import bs4
+import numpy as np
 import openpyxl
 import requests
 import xlrd
 
 from .abstract_file_parser import AbstractFileParser
+from .datetime_parser import xldates_as_datetime64
 
 
 class CSVFileParser(AbstractFileParser):
+    # Number of data lines read after the header to detect the dialect.
+    SNIFF_DATA_LINES = 5
+
     def __init__(self, file_path: str = None,
                  header_length: int = 10,
                  encoding_style: str = 'iso-8859-1',
-                 csv_delim_regex: str = None):
+                 csv_delim_regex: str = None,
+                 header_only: bool = False,
+                 delimiter: str = ','):
+        """
+        :param file_path: path to the csv file to parse
+        :param header_length: header length
+        :param encoding_style: encoding of the file
+        :param csv_delim_regex: a regex used to determine the delimiter of
+        the file. The delimiter must be the first group of the regex.
+        :param header_only: if True, the content of the file is read only
+        up to the line matching csv_delim_regex, included, or, when there
+        is no csv_delim_regex, up to the line at index header_length,
+        included. This is useful when the data block is parsed in bulk by
+        the file reader.
+        :param delimiter: the delimiter of the file, used when there is no
+        csv_delim_regex to determine it.
+        """
         super().__init__(file_path, header_length)
         self.encoding_style = encoding_style
         self.csv_delim_regex = csv_delim_regex
+        self.header_only = header_only
+        self.delimiter = delimiter
 
     def read_file(self):
-        """Read and save the content of the csv in a list."""
+        """
+        Read and save the content of the csv in a list.
+
+        When csv_delim_regex is set, the delimiter is searched line by line
+        in the header of the file only. The lines read to find it are then
+        chained with the rest of the file, so that the file is read and
+        decoded only once.
+        """
         with open(self._file, 'r', encoding=self.encoding_style) as csvfile:
+            prefix_lines = []
             if self.csv_delim_regex is None:
-                delimiter = ','
+                delimiter = self.delimiter
+            else:
+                delimiter = None
+                for line in csvfile:
+                    prefix_lines.append(line)
+                    match = re.search(self.csv_delim_regex, line,
+                                      flags=re.IGNORECASE)
+                    if match is not None:
+                        delimiter = match.group(1)
+                        break
+                else:
+                    raise ValueError(
+                        "Unable to determine the delimiter of the csv "
+                        "file {}".format(self._file))
+            self.delimiter = delimiter
+            if self.header_only and self.csv_delim_regex is not None:
+                lines = prefix_lines
+            elif self.header_only:
+                lines = itertools.islice(csvfile, self._header_length + 1)
             else:
-                delimiter = re.search(self.csv_delim_regex,
-                                      csvfile.read(),
-                                      flags=re.IGNORECASE).group(1)
-                csvfile.seek(0)
-            self._file_content = list(
-                csv.reader(csvfile, delimiter=delimiter, lineterminator='\n'))
+                lines = itertools.chain(prefix_lines, csvfile)
+            self._file_content = list(csv.reader(
+                lines, delimiter=delimiter, lineterminator='\n'))
 
     def read_file_header(self):
+        """
+        Read the header of the file. The csv dialect is sniffed from the
+        header and the first few data lines only.
+        """
         try:
             if not re.search(r"csv", self._file[-4:].lower()):
                 raise TypeError("Bad file type")
-            with open(self._file, 'r') as csvfile:
-                dialect = csv.Sniffer().sniff(csvfile.read())
-                csvfile.seek(0)
-                file_reader = csv.reader(csvfile, dialect=dialect)
+            with open(self._file, 'r', encoding=self.encoding_style) as csvfile:
+                prefix_lines = list(itertools.islice(
+                    csvfile, self._header_length + self.SNIFF_DATA_LINES))
+                while True:
+                    try:
+                        dialect = csv.Sniffer().sniff(''.join(prefix_lines))
+                        break
+                    except csv.Error:
+                        # The header is longer than expected, so the
+                        # prefix is doubled until it holds enough data
+                        # lines to determine the dialect.
+                        more_lines = list(itertools.islice(
+                            csvfile, len(prefix_lines)))
+                        if not more_lines:
+                            raise
+                        prefix_lines.extend(more_lines)
+                file_reader = csv.reader(prefix_lines, dialect=dialect)
                 for i, row in enumerate(file_reader):
                     self._file_header_content.append(row)
 
@@ -60,13 +126,30 @@ class CSVFileParser(AbstractFileParser):
 
 
 class TXTFileParser(AbstractFileParser):
-    def __init__(self, file_path: str = None, header_length: int = 20, encoding='utf8'):
+    def __init__(self, file_path: str = None, header_length: int = 20, encoding='utf8',
+                 header_only: bool = False):
+        """
+        :param file_path: path to the text file to parse
+        :param header_length: header length
+        :param encoding: encoding of the file
+        :param header_only: if True, only the first header_length lines of
+        the file are read. This is useful when the data block is parsed in
+        bulk by the file reader.
+        """
         self._encoding = encoding
+        self.header_only = header_only
         super().__init__(file_path, header_length)
 
+    @property
+    def encoding(self) -> str:
+        return self._encoding
+
     def read_file(self):
         with open(self._file, 'r', encoding=self._encoding) as txt_file:
-            self._file_content = [line.replace('\n', '') for line in txt_file.readlines()]
+            lines = txt_file
+            if self.header_only:
+                lines = itertools.islice(txt_file, self._header_length)
+            self._file_content = [line.replace('\n', '') for line in lines]
 
     def read_file_header(self):
         try:
@@ -80,13 +163,91 @@ class TXTFileParser(AbstractFileParser):
             warnings.warn("Error occured when trying to read the current file {}".format(self._file))
 
 
+class LazySheetMapping(Mapping):
+    """
+    Read-only mapping of the sheet names of a workbook to their content.
+    The content of a sheet is loaded with load_sheet the first time it is
+    accessed, and then kept by the mapping. The optional close callable is
+    called once all the sheets are loaded, or when the mapping is closed,
+    to release the workbook.
+    """
+
+    def __init__(self, sheet_names: list, load_sheet, close=None):
+        self._sheet_names = list(sheet_names)
+        self._load_sheet = load_sheet
+        self._close = close
+        self._sheets = {}
+        if not self._sheet_names:
+            self._release_workbook()
+
+    def __getitem__(self, sheet_name) -> list:
+        if sheet_name not in self._sheets:
+            if sheet_name not in self._sheet_names:
+                raise KeyError(sheet_name)
+            self._sheets[sheet_name] = self._load_sheet(sheet_name)
+            if len(self._sheets) == len(self._sheet_names):
+                self._release_workbook()
+        return self._sheets[sheet_name]
+
+    def __contains__(self, sheet_name) -> bool:
+        # Checking if a sheet exists must not load its content.
+        return sheet_name in self._sheet_names
+
+    def __iter__(self):
+        return iter(self._sheet_names)
+
+    def __len__(self) -> int:
+        return len(self._sheet_names)
+
+    def __reduce__(self):
+        # The workbook can't be pickled, so all the sheets are loaded and
+        # pickled as a plain ordered dict.
+        return OrderedDict, (list(self.items()),)
+
+    def close(self):
+        """
+        Release the workbook. The sheets that were not loaded yet are
+        dropped from the mapping, since they can't be read anymore.
+        """
+        self._sheet_names = [sheet_name for sheet_name in self._sheet_names
+                             if sheet_name in self._sheets]
+        self._release_workbook()
+
+    def _release_workbook(self):
+        if self._close is not None:
+            self._close()
+        self._load_sheet = None
+        self._close = None
+
+
 class EXCELFileParser(AbstractFileParser):
-    def __init__(self, file_path: str = None, header_length: int = None):
+    def __init__(self, file_path: str = None, header_length: int = None,
+                 sheet_filter: str = None):
+        """
+        :param file_path: path to the excel file to parse
+        :param header_length: header length
+        :param sheet_filter: a regex that the name of a sheet must match
+        (with re.search) to be part of the file content. By default, all
+        the sheets of the workbook are kept.
+        """
         super().__init__(file_path, header_length)
+        self.sheet_filter = sheet_filter
         self._file_content = OrderedDict()
         self._file_header_content = {}
         self.nb_sheets = 0
 
+    def __getattr__(self, name):
+        # Backward compatible access to the sheets of the workbook by
+        # their position, starting at 1 : self.sheet1, self.sheet2, etc.
+        match = re.fullmatch(r"sheet(\d+)", name)
+        if match is not None:
+            sheet_names = list(self.__dict__.get('_file_content', {}))
+            index = int(match.group(1)) - 1
+            if 0 <= index < len(sheet_names):
+                return self._file_content[sheet_names[index]]
+        raise AttributeError("'{}' object has no attribute '{}'".format(
+            type(self).__name__, name))
+
     def read_file(self):
         try:
             assert re.search(r".*xl.*", self._file)
@@ -104,8 +265,9 @@ class EXCELFileParser(AbstractFileParser):
 
     def __read_xls_file(self):
         """
-        method that read an xls file and create an entry in the file content dictionnary
-        having the sheet name as a key
+        method that open an xls file and create a lazy file content mapping
+        having the sheet names as keys. The content of a sheet is only read
+        the first time it is accessed.
         example: self._file_content['Sheet1'] = [ [row1],[row2],...] ]
         each row is a list of cell values as follow : row1 = [cell1.value, cell2.value,...]
         NOTE: during the xls data parsing:
@@ -113,50 +275,74 @@ class EXCELFileParser(AbstractFileParser):
         -   blank or empty cells or replaced by None
         :return: None
         """
-        file = xlrd.open_workbook(self._file)
-
-        for sheet in file.sheet_names():
-            self.nb_sheets += 1
-            current_sheet = file.sheet_by_name(sheet)
-            sheet_content = []
-            for row in range(current_sheet.nrows):
-                current_row = []
-                # transform the cells value to the appropriate type
-                for cells in current_sheet.row(row):
-                    # convert blank and empty cells to None
-                    if cells.ctype in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK):
-                        current_row.append(None)
-                    # convert xldate cells to datetime.datetime.
-                    elif cells.ctype == xlrd.XL_CELL_DATE:
-                        current_row.append(xlrd.xldate.xldate_as_datetime(cells.value, file.datemode))
-                    else:
-                        current_row.append(cells.value)
-                sheet_content.append(current_row)
-            self._file_content[sheet] = sheet_content
-            #
-            setattr(EXCELFileParser, 'sheet{}'.format(self.nb_sheets), self._file_content[sheet])
+        file = xlrd.open_workbook(self._file, on_demand=True)
+        self._file_content = LazySheetMapping(
+            self._filter_sheet_names(file.sheet_names()),
+            functools.partial(self.__read_xls_sheet, file),
+            close=file.release_resources)
+        self.nb_sheets = len(self._file_content)
+
+    @staticmethod
+    def __read_xls_sheet(file, sheet) -> list:
+        current_sheet = file.sheet_by_name(sheet)
+        sheet_content = np.empty((current_sheet.nrows, current_sheet.ncols),
+                                 dtype=object)
+        # The cells are transformed to the appropriate type one whole
+        # column at a time.
+        for col in range(current_sheet.ncols):
+            cell_types = np.array(current_sheet.col_types(col))
+            cell_values = np.array(current_sheet.col_values(col), dtype=object)
+            # convert blank and empty cells to None
+            cell_values[np.isin(cell_types, (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK))] = None
+            # convert xldate cells to datetime.datetime.
+            is_date = cell_types == xlrd.XL_CELL_DATE
+            if is_date.any():
+                cell_values[is_date] = xldates_as_datetime64(
+                    cell_values[is_date].astype(float), file.datemode
+                ).astype('datetime64[us]').astype(object)
+            sheet_content[:, col] = cell_values
+        file.unload_sheet(sheet)
+        return sheet_content.tolist()
 
     def __read_xlsx_file(self):
         """
-        method that read an xlsx file and create an entry in the file content dictionnary
-        having the sheet name as a key
+        method that open an xlsx file and create a lazy file content mapping
+        having the sheet names as keys. The content of a sheet is only read
+        the first time it is accessed.
         example: self._file_content['Sheet1'] = [ [row1],[row2],...] ]
         each row is a list of cell values as follow : row1 = [cell1.value, cell2.value,...]
-        NOTE: during the xlsx data parsing, cells that contains date are transformed as datetime.datetime
+        NOTE: the workbook is opened in read-only mode and the rows are
+        streamed. Cells that contains date are transformed as datetime.datetime
+        and cells that contains a formula hold the value last computed by Excel.
         :return: None
         """
-        excel_file = openpyxl.load_workbook(filename=self._file)
-        for sheet in excel_file.sheetnames:
-            self.nb_sheets += 1
-            current_sheet = excel_file[sheet]
-            sheet_content = []
-            for row in current_sheet.rows:
-                current_row = []
-                for cell in row:
-                    current_row.append(cell.value)
-                sheet_content.append(current_row)
-            self._file_content[sheet] = sheet_content
-            setattr(EXCELFileParser, 'sheet{}'.format(self.nb_sheets), self._file_content[sheet])
+        excel_file = openpyxl.load_workbook(
+            filename=self._file, read_only=True, data_only=True)
+        self._file_content = LazySheetMapping(
+            self._filter_sheet_names(excel_file.sheetnames),
+            functools.partial(self.__read_xlsx_sheet, excel_file),
+            close=excel_file.close)
+        self.nb_sheets = len(self._file_content)
+
+    @staticmethod
+    def __read_xlsx_sheet(excel_file, sheet) -> list:
+        return [list(row) for row in
+                excel_file[sheet].iter_rows(values_only=True)]
+
+    def close(self):
+        """
+        Extension of the base class method. Release the workbook, which is
+        kept open until all the sheets of the file content are loaded.
+        """
+        if isinstance(self._file_content, LazySheetMapping):
+            self._file_content.close()
+            self.nb_sheets = len(self._file_content)
+
+    def _filter_sheet_names(self, sheet_names: list) -> list:
+        if self.sheet_filter is None:
+            return list(sheet_names)
+        return [sheet for sheet in sheet_names
+                if re.search(self.sheet_filter, sheet)]
 
     def read_file_header(self, sheet_name) -> list:
         assert sheet_name in list(self._file_content.keys())
@@ -172,15 +358,43 @@ class EXCELFileParser(AbstractFileParser):
 
 class XMLFileParser(AbstractFileParser):
     def __init__(self, file_path: str = None, header_length: int = None,
-                 encoding: str = 'iso-8859-1'):
+                 encoding: str = 'iso-8859-1', iterparse: bool = False):
+        """
+        :param file_path: path to the xml file to parse
+        :param header_length: header length
+        :param encoding: encoding of the file
+        :param iterparse: if True, the file is not parsed in an ElementTree
+        on instantiation. Use the 'iterparse' method to stream the elements
+        of the file instead.
+        """
         super().__init__(file_path, header_length)
         self._encoding = encoding
-        self._file_content = ET.parse(open(
-            self._file, encoding=self._encoding))
+        self.iterparse_mode = iterparse
+        if not self.iterparse_mode:
+            self._file_content = ET.parse(open(
+                self._file, encoding=self._encoding))
+        else:
+            self._file_content = None
 
     def read_file(self):
         pass
 
+    def iterparse(self, events: tuple = ('end',)):
+        """
+        Stream the (event, element) pairs of the xml file with
+        ElementTree.iterparse, without building the whole tree up front.
+        It is the responsibility of the caller to clear the elements
+        once they are consumed.
+
+        Once the file is fully streamed, what remains of the tree is
+        available through the file content, like in the non-streamed mode.
+        """
+        with open(self._file, encoding=self._encoding) as xml_file:
+            elements = ET.iterparse(xml_file, events=events)
+            for event, element in elements:
+                yield event, element
+        self._file_content = ET.ElementTree(elements.root)
+
     def read_file_header(self):
         pass
 
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © HydroSensorReader Project Contributors
+# https://github.com/cgq-qgc/HydroSensorReader
+#
+# This file is part of HydroSensorReader.
+# Licensed under the terms of the MIT License.
+# -----------------------------------------------------------------------------
+
+"""
+Vectorized parsing of the date and time columns of the data files.
+
+All the time series readers hand whole columns of date and time strings to
+this module instead of parsing their timestamps one row at a time.
+"""
+
+# ---- Standard imports
+import datetime
+from typing import Iterable, Optional, Sequence
+
+# ---- Third party imports
+import numpy as np
+import pandas as pd
+
+# Date and time formats written by the vendors supported by this package.
+# The formats with a fractional part must come before their counterpart
+# without one, since the later would never match the former.
+SOLINST_LEV_DATETIME_FORMATS = ('%Y/%m/%d %H:%M:%S.%f',
+                                '%Y-%m-%d %H:%M:%S.%f')
+SOLINST_XLE_DATETIME_FORMATS = ('%Y/%m/%d %H:%M:%S.%f',)
+SOLINST_CSV_DATETIME_FORMATS = ('%Y/%m/%d %H:%M:%S.%f',
+                                '%Y-%m-%d %H:%M:%S.%f',
+                                '%Y/%m/%d %H:%M:%S',
+                                '%Y-%m-%d %H:%M:%S')
+CAMPBELL_TOA5_DATETIME_FORMATS = ('%Y-%m-%d %H:%M:%S.%f',
+                                  '%Y-%m-%d %H:%M:%S')
+HYDROLAB_DATETIME_FORMATS = ('%Y-%m-%d %H:%M:%S',)
+# Duplicated formats are removed while preserving their order.
+VENDOR_DATETIME_FORMATS = tuple(dict.fromkeys(
+    SOLINST_LEV_DATETIME_FORMATS +
+    SOLINST_CSV_DATETIME_FORMATS +
+    CAMPBELL_TOA5_DATETIME_FORMATS +
+    HYDROLAB_DATETIME_FORMATS +
+    ('%Y-%m-%d %H:%M', '%Y/%m/%d %H:%M', '%m/%d/%y %H:%M:%S',
+     '%Y-%m-%d', '%Y/%m/%d')))
+
+# Number of rows used to infer the format of a column.
+INFER_FORMAT_NROWS = 10
+
+# Epochs of the Excel serial dates. See xlrd.xldate.xldate_as_datetime.
+EXCEL_1900_EPOCH = np.datetime64('1899-12-31', 'ms')
+# Excel wrongly considers 1900 as a leap year, so the epoch of the serial
+# dates after 1900-02-28 is moved back by one day.
+EXCEL_1900_EPOCH_MINUS_1 = np.datetime64('1899-12-30', 'ms')
+EXCEL_1904_EPOCH = np.datetime64('1904-01-01', 'ms')
+
+
+def infer_datetime_format(samples: Iterable[str],
+                          formats: Sequence[str] = VENDOR_DATETIME_FORMATS
+                          ) -> Optional[str]:
+    """
+    Return the first format of formats that can parse all the given
+    samples, or None if no format matches.
+    """
+    samples = list(samples)
+    if not samples:
+        return None
+    for fmt in formats:
+        try:
+            for sample in samples:
+                datetime.datetime.strptime(sample, fmt)
+        except ValueError:
+            continue
+        return fmt
+    return None
+
+
+def join_datetime_columns(*columns: Iterable,
+                          seps: Sequence[str] = None) -> np.ndarray:
+    """
+    Join elementwise the date and time columns and return the result
+    as an array of strings.
+
+    The columns are joined with a space, unless the separators to put
+    between each pair of consecutive columns are provided in seps.
+    """
+    if seps is None:
+        seps = [' '] * (len(columns) - 1)
+    if len(seps) != len(columns) - 1:
+        raise ValueError("There must be one separator less than columns.")
+
+    joined = np.char.strip(np.asarray(columns[0], dtype=str))
+    for sep, column in zip(seps, columns[1:]):
+        joined = np.char.add(np.char.add(joined, sep), np.char.strip(
+            np.asarray(column, dtype=str)))
+    return joined
+
+
+def parse_datetime_columns(*columns: Iterable,
+                           seps: Sequence[str] = None,
+                           fmt: str = None,
+                           formats: Sequence[str] = VENDOR_DATETIME_FORMATS,
+                           errors: str = 'raise') -> pd.DatetimeIndex:
+    """
+    Parse whole date and time string columns in a single vectorized call.
+
+    Parameters
+    ----------
+    *columns : array-like of str
+        One or more columns of strings that are joined elementwise before
+        being parsed. For example, a date column and a time column.
+    seps : sequence of str
+        The separators used to join each pair of consecutive columns.
+        By default, the columns are joined with a space.
+    fmt : str
+        The strftime format of the joined strings. If None, the format is
+        inferred once from the first rows of the columns.
+    formats : sequence of str
+        The candidate formats, in order of preference, used to infer the
+        format of the columns. By default, all the vendor formats
+        supported by this package are tried.
+    errors : {'raise', 'coerce'}
+        If 'coerce', the strings that cannot be parsed are set as NaT.
+
+    Returns
+    -------
+    pd.DatetimeIndex
+        The parsed timestamps.
+    """
+    strings = join_datetime_columns(*columns, seps=seps)
+    if fmt is None:
+        samples = [s for s in strings[:INFER_FORMAT_NROWS] if s]
+        fmt = infer_datetime_format(samples, formats)
+    if fmt is None:
+        # The format is unknown, so we fall back on pandas inference.
+        return pd.DatetimeIndex(pd.to_datetime(strings, errors=errors))
+    return pd.DatetimeIndex(
+        pd.to_datetime(strings, format=fmt, errors=errors))
+
+
+def parse_date_components(year: Iterable, month: Iterable,
+                          day: Iterable) -> pd.DatetimeIndex:
+    """
+    Build the timestamps from whole columns of year, month and day numbers
+    in a single vectorized call.
+
+    The columns can hold numbers or strings of numbers, such as '1972.0'.
+    """
+    components = pd.DataFrame({
+        'year': pd.to_numeric(np.asarray(year)),
+        'month': pd.to_numeric(np.asarray(month)),
+        'day': pd.to_numeric(np.asarray(day))})
+    return pd.DatetimeIndex(
+        pd.to_datetime(components.astype(int)))
+
+
+def xldates_as_datetime64(xldates: Iterable[float],
+                          datemode: int) -> np.ndarray:
+    """
+    Convert a whole column of Excel serial dates to datetime64 in a single
+    vectorized operation.
+
+    The conversion is the same as the one of xlrd.xldate_as_datetime,
+    including the rounding of the time to the nearest millisecond.
+
+    Parameters
+    ----------
+    xldates : array-like of float
+        The Excel serial dates to convert.
+    datemode : int
+        The datemode of the workbook: 0 for dates based on 1900 and 1 for
+        dates based on 1904.
+
+    Returns
+    -------
+    np.ndarray
+        The dates as a datetime64[ms] array.
+    """
+    xldates = np.asarray(xldates, dtype=float)
+    days = np.trunc(xldates)
+    milliseconds = np.round((xldates - days) * 86400000.0)
+    if datemode:
+        epoch = EXCEL_1904_EPOCH
+    else:
+        epoch = np.where(xldates < 60, EXCEL_1900_EPOCH,
+                         EXCEL_1900_EPOCH_MINUS_1)
+    return (epoch +
+            days.astype('int64').astype('timedelta64[D]') +
+            milliseconds.astype('int64').astype('timedelta64[ms]'))
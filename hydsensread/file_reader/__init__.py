@@ -9,8 +9,8 @@ from hydsensread.file_reader.abstract_file_reader import (
     AbstractFileReader, GeochemistryFileReader, TimeSeriesFileReader,
     TimeSeriesGeochemistryFileReader)
 from .compagny_file_reader import (
-    SolinstFileReader, DATCampbellCRFileReader, XLSHannaFileReader,
-    XSLMaxxamFileReader)
+    SolinstFileReader, DATCampbellCRFileReader, DATCampbellTOB1FileReader,
+    XLSHannaFileReader, XSLMaxxamFileReader)
 try:
     from .web_page_reader import (GNBWaterQualityStation,
                                   GNBCoreSamplesNTSMapSearchWebScrapper)
@@ -18,7 +18,7 @@ from pandas.plotting import register_matplotlib_converters
 
 from hydsensread import file_parser
 from hydsensread.site_and_records import (
-    DrillingSite, geographical_coordinates, Sample, SensorPlateform)
+    DrillingSite, geographical_coordinates, Sample, SampleTable, SensorPlateform)
 
 register_matplotlib_converters()
 sample_ana_type = Dict[str, Sample]
@@ -60,6 +60,7 @@ class AbstractFileReader(object, metaclass=ABCMeta):
     XLS_FILES_TYPES = ['xls', 'xlsx']
     XML_FILES_TYPES = ['xle', 'xml']
     CSV_FILES_TYPES = ['csv']
+    TSV_FILES_TYPES = ['out', 'tsv']
     WEB_XML_FILES_TYPES = ['http']
     MONTH_S_DAY_S_YEAR_HMS_DATE_STRING_FORMAT = '%m/%d/%y %H:%M:%S'
     YEAR_S_MONTH_S_DAY_HM_DATE_STRING_FORMAT = '%Y/%m/%d %H:%M'
@@ -73,7 +74,8 @@ class AbstractFileReader(object, metaclass=ABCMeta):
                  request_params: dict = None,
                  encoding='utf8',
                  wait_read=False,
-                 csv_delim_regex: str = None):
+                 csv_delim_regex: str = None,
+                 keep_raw: bool = True):
         """
         :param file_path: path to the file to treat
         :param header_length: header length
@@ -85,12 +87,17 @@ class AbstractFileReader(object, metaclass=ABCMeta):
         csv files when parsing the data
         See file_reader.compagny_file_reader.solinst_file_reader.py
         for an example
+        :param keep_raw: if keep_raw is False, the raw content of the file
+        and the file parser are released once the data are read, so that
+        only the parsed data are kept in memory. This also makes the reader
+        cheap to pickle.
         """
         self.request_params = request_params
         self._file = file_path
         self._header_length = header_length
         self._encoding = encoding
         self._csv_delim_regex = csv_delim_regex
+        self._keep_raw = keep_raw
         self._site_of_interest = None
         self.file_reader = self._set_file_reader()
         if not wait_read:
@@ -125,6 +132,11 @@ class AbstractFileReader(object, metaclass=ABCMeta):
                     file_path=self._file,
                     header_length=self._header_length,
                     csv_delim_regex=self._csv_delim_regex)
+            elif file_ext in self.TSV_FILES_TYPES:
+                file_reader = file_parser.CSVFileParser(
+                    file_path=self._file,
+                    header_length=self._header_length,
+                    delimiter='\t')
             elif file_ext in self.WEB_XML_FILES_TYPES or 'http' in self._file:
                 file_reader = file_parser.WEBFileParser(
                     file_path=self._file,
@@ -140,8 +152,22 @@ class AbstractFileReader(object, metaclass=ABCMeta):
             return file_reader
 
     def read_file(self):
-        self._make_site()
-        self._make_data()
+        try:
+            self._make_site()
+            self._make_data()
+        finally:
+            self.file_reader.close()
+        if not self._keep_raw:
+            self.release_raw_content()
+
+    def release_raw_content(self):
+        """
+        Release the raw content of the file and the file parser. Only the
+        parsed data are kept afterward, so the file can't be read again.
+        """
+        if self.file_reader is not None:
+            self.file_reader.close()
+        self.file_reader = None
 
     @property
     def file_extension(self):
@@ -153,6 +179,9 @@ class AbstractFileReader(object, metaclass=ABCMeta):
 
     @property
     def file_content(self) -> Union[ET.ElementTree, bs4.BeautifulSoup, list, ]:
+        if self.file_reader is None:
+            raise ValueError("The raw content of the file was released "
+                             "after it was read.")
         return self.file_reader.get_file_content
 
     def _make_site(self):
@@ -186,9 +215,10 @@ class AbstractFileReader(object, metaclass=ABCMeta):
 class TimeSeriesFileReader(AbstractFileReader):
     def __init__(self, file_path: str = None, header_length: int = 10,
                  encoding='utf8', wait_read: bool = False,
-                 csv_delim_regex: str = None):
+                 csv_delim_regex: str = None, keep_raw: bool = True):
         super().__init__(file_path, header_length, encoding=encoding,
-                         wait_read=wait_read, csv_delim_regex=csv_delim_regex)
+                         wait_read=wait_read, csv_delim_regex=csv_delim_regex,
+                         keep_raw=keep_raw)
         self._site_of_interest = SensorPlateform()
         self._date_list = []
         self.header_content = {}
@@ -239,8 +269,32 @@ class TimeSeriesFileReader(AbstractFileReader):
         fig.legend(loc=legend_loc)
         return fig, all_axis
 
-    def remove_duplicates(self) -> DataFrame:
-        self.records = self.records.drop_duplicates()
+    def remove_duplicates(self, keep: str = 'first') -> DataFrame:
+        """
+        Remove the records sharing the same timestamp. Only the index is
+        looked at, so records repeating the same values at different
+        timestamps are kept.
+        :param keep: 'first' or 'last' to keep the first or the last record
+        of each timestamp, or 'mean' to replace them by their mean. The mean
+        of the non numeric columns is not defined, so their first value is
+        kept.
+        :return: the records without duplicated timestamps
+        """
+        if keep not in ('first', 'last', 'mean'):
+            raise ValueError("keep must be 'first', 'last' or 'mean', not {}".format(keep))
+        records = self.records
+        index = records.index
+        # The uniqueness of a monotonic index is found by comparing its
+        # consecutive values, without hashing, and is cached by pandas.
+        if index.is_monotonic_increasing and index.is_unique:
+            return records
+        if keep == 'mean':
+            unique_records = records[~index.duplicated()].copy()
+            means = records.groupby(level=0, sort=False).mean(numeric_only=True)
+            unique_records[means.columns] = means
+            self.records = unique_records
+        else:
+            self.records = records[~index.duplicated(keep=keep)]
         return self.records
 
     def _add_axe_to_plot(self, parent_plot,
@@ -283,13 +337,25 @@ class TimeSeriesFileReader(AbstractFileReader):
 
 class GeochemistryFileReader(AbstractFileReader):
     def __init__(self, file_path: str = None,
-                 header_length: int = 10, **kwargs):
-        super().__init__(file_path, header_length)
+                 header_length: int = 10, keep_raw: bool = True, **kwargs):
+        super().__init__(file_path, header_length, keep_raw=keep_raw)
         self._site_of_interest = defaultdict(dict)  # dict of Samples
+        # the records of the samples are stored in a single table
+        self.sample_table = SampleTable()
         self.project = None
         self.report_date = None
         self.analysis_methode = None
 
+    def read_file(self):
+        # The records of a previous read are dropped, so that reading the
+        # file again doesn't add them twice to the samples.
+        self.sample_table = SampleTable()
+        super().read_file()
+
+    @property
+    def records(self) -> DataFrame:
+        return self.sample_table.to_dataframe()
+
     def _read_file_header(self):
         pass
 
@@ -297,7 +363,7 @@ class GeochemistryFileReader(AbstractFileReader):
         pass
 
     def create_sample(self, sample_name: str):
-        sample = Sample(site_name=sample_name)
+        sample = Sample(site_name=sample_name, table=self.sample_table)
         self._site_of_interest[sample_name] = sample
         yield self._site_of_interest[sample_name]
 
@@ -306,7 +372,8 @@ class GeochemistryFileReader(AbstractFileReader):
                                lab_sample_name: str = None,
                                sample_type: str = None,
                                project_name: str = None):
-        sample = Sample(site_name, visit_date, lab_sample_name, sample_type, project_name)
+        sample = Sample(site_name, visit_date, lab_sample_name, sample_type,
+                        project_name=project_name, table=self.sample_table)
         self._site_of_interest[site_name] = sample
 
 
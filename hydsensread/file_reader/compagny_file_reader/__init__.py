@@ -5,11 +5,13 @@ __description__ = ""
 __version__ = '0.0.1'
 
 from .campbell_cr_file_reader import DATCampbellCRFileReader
+from .campbell_cr_file_reader import DATCampbellTOB1FileReader
 from .hanna_file_reader import XLSHannaFileReader
 from .maxxam_file_reader import XSLMaxxamFileReader
 from .solinst_file_reader import (
     SolinstFileReader, CSVSolinstFileReader, LEVSolinstFileReader,
     XLESolinstFileReader)
 from .what_csv_file_reader import WhatMeteorologicalDataFileReader
+from .what_csv_file_reader import WhatMeteorologicalOutFileReader
 from .what_csv_file_reader import WhatStreamAndLevelDataFileReader
 from .what_csv_file_reader import WhatWaterLevelDataFileReader
@@ -7,34 +7,200 @@ __date__ = '2018-04-09'
 __description__ = " "
 __version__ = '1.0'
 
+import io
+import json
+import os
+import os.path as osp
+import re
+import warnings
+
 import matplotlib.pyplot as plt
-import pandas as pd
 import numpy as np
-from hydsensread.file_reader.abstract_file_reader import TimeSeriesFileReader, date_list, LineDefinition
+import pandas as pd
+from hydsensread import file_parser
+from hydsensread.file_parser import parse_datetime_columns
+from hydsensread.file_parser.datetime_parser import CAMPBELL_TOA5_DATETIME_FORMATS
+from hydsensread.file_reader.abstract_file_reader import TimeSeriesFileReader, LineDefinition
 
 VALUES_START = 4
 COL_HEADER = 'col_header'
+# Values written by the datalogger when a measurement is missing.
+NAN_VALUES = ['NAN']
+
+TOB1_VALUES_START = 5
+DATA_TYPES = 'data_types'
+# Epoch of the timestamps of the TOB1 files.
+TOB1_EPOCH = np.datetime64('1990-01-01', 'ns')
+# Numpy dtypes of the data types of the TOB1 files. The numerical values
+# are little-endian, except the FP2 values which are big-endian.
+_SECNANO_DTYPE = [('seconds', '<i4'), ('nanoseconds', '<i4')]
+TOB1_DATA_TYPES = {
+    'IEEE4': '<f4', 'IEEE4L': '<f4', 'IEEE4B': '>f4',
+    'IEEE8': '<f8', 'IEEE8L': '<f8', 'IEEE8B': '>f8',
+    'FP2': '>u2',
+    'ULONG': '<u4', 'UINT4': '<u4', 'LONG': '<i4', 'INT4': '<i4',
+    'UINT2': '<u2', 'INT2': '<i2', 'UINT1': 'u1', 'INT1': 'i1',
+    'BOOL': '<i4', 'BOOL4': '<i4', 'BOOL2': '<i2', 'BOOL8': 'u1',
+    'SecNano': _SECNANO_DTYPE, 'NSec': _SECNANO_DTYPE}
+
+
+def decode_fp2(raw_values: np.ndarray) -> np.ndarray:
+    """
+    Decode the Campbell FP2 values, which are 2 bytes big-endian floats.
+
+    The first bit of a FP2 value is its sign, the next two bits are the
+    negative decimal exponent and the last 13 bits are the mantissa.
+    """
+    raw_values = np.asarray(raw_values).astype(np.uint16)
+    sign = np.where(raw_values & 0x8000, -1.0, 1.0)
+    exponent = (raw_values >> 13) & 0x3
+    mantissa = (raw_values & 0x1FFF).astype(float)
+    values = sign * mantissa / 10.0 ** exponent
+    values[raw_values == 0x1FFF] = np.inf
+    values[raw_values == 0x9FFF] = -np.inf
+    values[raw_values == 0x9FFE] = np.nan
+    return values
 
 
 class DATCampbellCRFileReader(TimeSeriesFileReader):
-    def __init__(self, file_path: str = None, header_length: int = 4):
-        super().__init__(file_path, header_length)
-        self.datas = [i.split(',') for i in self.file_content[VALUES_START:]]
+    def __init__(self, file_path: str = None, header_length: int = VALUES_START,
+                 keep_raw: bool = True, checkpoint_file: str = None):
+        """
+        :param checkpoint_file: path to a json file where the byte offset and
+        the last TIMESTAMP read from the file are saved after each read.
+        When the checkpoint exists, only the rows appended to the file after
+        it are read, so that a follow of the file survives a restart.
+        See update_records to read the rows appended to the file while the
+        reader is alive.
+        """
+        self._checkpoint_file = checkpoint_file
+        # Records read by update_records, joined to the records when they are read.
+        self._pending_records = []
+        self._data_block = None
+        # Byte offset of the end of the last complete row read from the file.
+        self._data_offset = None
+        self._last_timestamp = None
+        self._toa5_header = None
+        super().__init__(file_path, header_length, keep_raw=keep_raw)
 
     @property
     def data_header(self):
         return self.header_content[COL_HEADER]
 
+    def _set_file_reader(self) -> file_parser.TXTFileParser:
+        """
+        Extension of the base class method.
+
+        Only the header lines of the file are read with the text parser.
+        The data block is parsed in bulk with pandas in _read_data_block.
+        """
+        return file_parser.TXTFileParser(
+            file_path=self._file,
+            header_length=self._header_length,
+            encoding=self._encoding,
+            header_only=True)
+
     def read_file(self):
-        self._date_list = self._get_date_list()
+        self._toa5_header = self.file_content[0]
+        self._load_checkpoint()
         super().read_file()
+        self.save_checkpoint()
+
+    @property
+    def records(self) -> pd.DataFrame:
+        if self._pending_records:
+            self._join_pending_records()
+        return self.sites.records
+
+    @records.setter
+    def records(self, value: pd.DataFrame):
+        self._pending_records = []
+        self.sites.records = value
+
+    def update_records(self) -> pd.DataFrame:
+        """
+        Read the rows appended to the file since the last read and add them
+        at the end of the records. Only the appended bytes are parsed and
+        the new records are kept in a buffer, which is joined to the
+        records only once, when the records are read.
+
+        :return: the new records
+        """
+        if self._data_offset is None:
+            # No data block was read yet, so all the rows of the file are
+            # read, starting right after the header lines.
+            self._data_offset = self._find_data_offset()
+        if osp.getsize(self._file) < self._data_offset:
+            raise ValueError("The file is shorter than the last read offset. "
+                             "It was truncated or replaced.")
+        dates = self._get_date_list()
+        new_records = self._make_records(dates)
+        if len(new_records):
+            self._pending_records.append(new_records)
+        self.save_checkpoint()
+        return new_records
+
+    def _join_pending_records(self):
+        """
+        Join the buffered new records to the records. Like remove_duplicates
+        on a full read, the first record of each timestamp is kept, but only
+        the new records are checked against the records they are added to.
+        """
+        records = self.sites.records
+        new_records = pd.concat(self._pending_records) \
+            if len(self._pending_records) > 1 else self._pending_records[0]
+        self._pending_records = []
+        new_index = new_records.index
+        is_kept = ~new_index.duplicated()
+        if len(records) and new_index.min() <= records.index.max():
+            # Some new records meet the timestamps of the records.
+            if records.index.is_monotonic_increasing:
+                positions = records.index.searchsorted(new_index).clip(max=len(records) - 1)
+                is_kept &= records.index[positions] != new_index
+            else:
+                is_kept &= ~new_index.isin(records.index)
+        if not is_kept.all():
+            new_records = new_records[is_kept]
+        self.sites.records = pd.concat([records, new_records])
+
+    def save_checkpoint(self):
+        """
+        Save the byte offset and the last TIMESTAMP read from the file in
+        the checkpoint file, if any. The checkpoint is replaced atomically.
+        """
+        if self._checkpoint_file is None:
+            return
+        checkpoint = {
+            'file_path': self._file,
+            'toa5_header': self._toa5_header,
+            'offset': self._data_offset,
+            'last_timestamp': (None if self._last_timestamp is None else
+                               self._last_timestamp.isoformat())}
+        tmp_file = self._checkpoint_file + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_file, self._checkpoint_file)
+
+    def _load_checkpoint(self):
+        if self._checkpoint_file is None or not osp.exists(self._checkpoint_file):
+            return
+        with open(self._checkpoint_file) as f:
+            checkpoint = json.load(f)
+        if (checkpoint['toa5_header'] != self._toa5_header or
+                checkpoint['offset'] > osp.getsize(self._file)):
+            warnings.warn("The checkpoint {} doesn't match the file {}. "
+                          "The file is read from the start.".format(
+                              self._checkpoint_file, self._file))
+            return
+        self._data_offset = checkpoint['offset']
+        if checkpoint['last_timestamp'] is not None:
+            self._last_timestamp = pd.Timestamp(checkpoint['last_timestamp'])
 
     def _read_file_header(self):
         """
         implementation of the base class abstract method
         """
         header_content = [i.replace('"', '') for i in self.file_content[0].split(',')]
-        print(header_content)
         self.sites.site_name = header_content[-1]
         self.sites.instrument_serial_number = header_content[3]
 
@@ -42,19 +208,32 @@ class DATCampbellCRFileReader(TimeSeriesFileReader):
         """
         implementation of the base class abstract method
         """
-        datas = []
-        for row in self.datas:
-            row_content = []
-            for val in row[2:]:
-                if val == '"NAN"':
-                    row_content.append(np.nan)
-                else:
-                    row_content.append(float(val))
-            datas.append(row_content)
-        self.records = pd.DataFrame(data=datas,
-                                    index=self._date_list,
-                                    columns=self.data_header[2:])
-        self.remove_duplicates()
+        self._date_list = self._get_date_list()
+        self._set_records(self._date_list)
+        if self.sites.time_index is None:
+            # the records sampled at a regular interval have no duplicated timestamps
+            self.remove_duplicates()
+
+    def _set_records(self, dates: pd.DatetimeIndex):
+        """
+        Set the records of the data block. When they are sampled at a
+        regular interval, the plateform keeps their dates as a
+        RegularTimeIndex.
+        """
+        values = self._data_block.values[:, 2:].astype(float)
+        self._data_block = None
+        self.records = pd.DataFrame()
+        self.sites.set_time_series(
+            dates,
+            [(column, None, values[:, i]) for i, column in enumerate(self.data_header[2:])],
+            name_format='{}')
+
+    def _make_records(self, dates: pd.DatetimeIndex) -> pd.DataFrame:
+        records = pd.DataFrame(data=self._data_block.values[:, 2:].astype(float),
+                               index=dates,
+                               columns=self.data_header[2:])
+        self._data_block = None
+        return records
 
     def _read_file_data_header(self):
         """
@@ -67,13 +246,59 @@ class DATCampbellCRFileReader(TimeSeriesFileReader):
         header_col_def = ['{} ({})'.format(i, j) for i, j in column_agg]
         self.header_content[COL_HEADER] = header_col_def
 
-    def _get_date_list(self) -> date_list:
-        dates = []
-        for i in self.datas:
-            dates.append(pd.Timestamp(i[0].replace('"', '')))
-        self.sites.visit_date = dates[-1]
+    def _get_date_list(self) -> pd.DatetimeIndex:
+        """
+        Read the rows of the file that were not read yet and return their
+        dates. The rows that are not after the last TIMESTAMP read are
+        skipped.
+        """
+        self._data_block = self._read_data_block()
+        dates = self._parse_block_dates()
+        if self._last_timestamp is not None:
+            is_new = dates > self._last_timestamp
+            self._data_block = self._data_block[is_new]
+            dates = dates[is_new]
+        if len(dates):
+            self._last_timestamp = dates[-1]
+            self.sites.visit_date = dates[-1]
         return dates
 
+    def _parse_block_dates(self) -> pd.DatetimeIndex:
+        """Return the dates of the rows of the data block."""
+        return parse_datetime_columns(self._data_block[0].values,
+                                      formats=CAMPBELL_TOA5_DATETIME_FORMATS)
+
+    def _find_data_offset(self) -> int:
+        """Return the byte offset of the first row after the header lines."""
+        with open(self._file, 'rb') as f:
+            for i in range(self._header_length):
+                f.readline()
+            return f.tell()
+
+    def _read_data_block(self) -> pd.DataFrame:
+        """
+        Parse in bulk the rows of the TOA5 file that are after the last byte
+        offset read. The TIMESTAMP column is kept as strings and the 'NAN'
+        values are set to NaN.
+        """
+        if self._data_offset is None:
+            self._data_offset = self._find_data_offset()
+        with open(self._file, 'rb') as f:
+            f.seek(self._data_offset)
+            appended = f.read()
+        # A row that is still being written by the datalogger is left
+        # for the next read.
+        end = appended.rfind(b'\n') + 1
+        self._data_offset += end
+        return pd.read_csv(io.BytesIO(appended[:end]),
+                           header=None,
+                           names=range(len(self.data_header)),
+                           quotechar='"',
+                           dtype={0: str},
+                           na_values=NAN_VALUES,
+                           encoding=self._encoding,
+                           engine='c')
+
     def _add_common_subplots(self) -> List[LineDefinition]:
         outward = 0
         out_linedef = []
@@ -127,6 +352,138 @@ class DATCampbellCRFileReader(TimeSeriesFileReader):
         return fig, all_axis
 
 
+class DATCampbellTOB1FileReader(DATCampbellCRFileReader):
+    """
+    Reader for the binary TOB1 files of the Campbell dataloggers.
+
+    The five ASCII header lines of the file describe the fields of the
+    records. They are used to build a numpy structured dtype, with which
+    the binary records of the file are memory mapped. The records are
+    exposed with the same layout as the one of DATCampbellCRFileReader.
+    """
+
+    def __init__(self, file_path: str = None, header_length: int = TOB1_VALUES_START,
+                 keep_raw: bool = True, checkpoint_file: str = None):
+        super().__init__(file_path, header_length, keep_raw=keep_raw,
+                         checkpoint_file=checkpoint_file)
+
+    @property
+    def data_types(self) -> List[str]:
+        return self.header_content[DATA_TYPES]
+
+    def _set_file_reader(self) -> file_parser.TXTFileParser:
+        """
+        Extension of the base class method.
+
+        Only the ASCII header lines of the file are read with the text
+        parser. Since the binary records follow them, the header is decoded
+        with an encoding that accepts any byte.
+        """
+        return file_parser.TXTFileParser(
+            file_path=self._file,
+            header_length=self._header_length,
+            encoding='iso-8859-1',
+            header_only=True)
+
+    def _read_file_data_header(self):
+        """
+        Extension of the base class method.
+        """
+        super()._read_file_data_header()
+        self.header_content[DATA_TYPES] = [
+            i.replace('"', '').strip() for i in self.file_content[4].split(',')]
+
+    def _get_record_dtype(self) -> np.dtype:
+        """
+        Return the structured dtype of the binary records of the file,
+        built from the data types of the header. The fields are named after
+        their column index, since the names of the header can repeat.
+        """
+        fields = []
+        for i, data_type in enumerate(self.data_types):
+            ascii_match = re.fullmatch(r"ASCII\((\d+)\)", data_type)
+            if ascii_match is not None:
+                field_dtype = 'S{}'.format(ascii_match.group(1))
+            elif data_type in TOB1_DATA_TYPES:
+                field_dtype = TOB1_DATA_TYPES[data_type]
+            else:
+                raise ValueError("Unsupported TOB1 data type: {}".format(data_type))
+            fields.append(('f{}'.format(i), field_dtype))
+        return np.dtype(fields)
+
+    def _get_timestamp_fields(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the seconds and nanoseconds fields of the timestamps of the
+        records of the data block.
+        """
+        column_names = [i.split(' (')[0] for i in self.data_header]
+        if self.data_types[0] in ('SecNano', 'NSec'):
+            return (self._data_block['f0']['seconds'],
+                    self._data_block['f0']['nanoseconds'])
+        elif column_names[:2] == ['SECONDS', 'NANOSECONDS']:
+            return self._data_block['f0'], self._data_block['f1']
+        else:
+            raise ValueError("The TOB1 file has no timestamp fields.")
+
+    def _get_value_col_indexes(self) -> List[int]:
+        """
+        Return the indexes of the columns that are not part of the
+        timestamp or the record number.
+        """
+        first_col = 1 if self.data_types[0] in ('SecNano', 'NSec') else 2
+        return [i for i in range(first_col, len(self.data_header))
+                if self.data_header[i].split(' (')[0] != 'RECORD']
+
+    def _parse_block_dates(self) -> pd.DatetimeIndex:
+        """Extension of the base class method."""
+        seconds, nanoseconds = self._get_timestamp_fields()
+        return pd.DatetimeIndex(TOB1_EPOCH +
+                                seconds.astype('int64').astype('timedelta64[s]') +
+                                nanoseconds.astype('int64').astype('timedelta64[ns]'))
+
+    def _read_data_block(self) -> np.ndarray:
+        """
+        Memory map the complete binary records of the file that are after
+        the last byte offset read. A record that is still being written by
+        the datalogger is left for the next read.
+        """
+        if self._data_offset is None:
+            self._data_offset = self._find_data_offset()
+        dtype = self._get_record_dtype()
+        nrecords = (osp.getsize(self._file) - self._data_offset) // dtype.itemsize
+        if nrecords == 0:
+            return np.empty(0, dtype=dtype)
+        data_block = np.memmap(self._file, dtype=dtype, mode='r',
+                               offset=self._data_offset, shape=(nrecords,))
+        self._data_offset += nrecords * dtype.itemsize
+        return data_block
+
+    def _set_records(self, dates: pd.DatetimeIndex):
+        """
+        Extension of the base class method. The columns of the TOB1 files
+        have their own types, so the records are set as a DataFrame.
+        """
+        self.records = self._make_records(dates)
+
+    def _make_records(self, dates: pd.DatetimeIndex) -> pd.DataFrame:
+        """Extension of the base class method."""
+        col_indexes = self._get_value_col_indexes()
+        columns = []
+        for i in col_indexes:
+            values = self._data_block['f{}'.format(i)]
+            if self.data_types[i] == 'FP2':
+                values = decode_fp2(values)
+            elif values.dtype.kind == 'S':
+                values = np.char.decode(values, 'iso-8859-1')
+            else:
+                values = values.astype(float)
+            columns.append(values)
+        records = pd.DataFrame(dict(enumerate(columns)), index=dates)
+        records.columns = [self.data_header[i] for i in col_indexes]
+        self._data_block = None
+        return records
+
+
 if __name__ == '__main__':
     import os
 
@@ -12,12 +12,28 @@ import re
 import matplotlib.pyplot as plt
 import pandas as pd
 
-from hydsensread.file_reader.abstract_file_reader import TimeSeriesFileReader, date_list, LineDefinition
+from hydsensread import file_parser
+from hydsensread.file_reader.abstract_file_reader import TimeSeriesFileReader, LineDefinition
 
 
 class XLSHannaFileReader(TimeSeriesFileReader):
-    def __init__(self, file_path: str = None, header_length: int = 10,wait_read:bool = False):
-        super().__init__(file_path, header_length,wait_read=wait_read)
+    HEADER_SHEET = ' Lot Info '
+    DATA_SHEET = ' Log data - 1'
+
+    def __init__(self, file_path: str = None, header_length: int = 10,wait_read:bool = False,
+                 keep_raw: bool = True):
+        super().__init__(file_path, header_length,wait_read=wait_read, keep_raw=keep_raw)
+
+    def _set_file_reader(self) -> file_parser.EXCELFileParser:
+        """
+        Extension of the base class method. Only the header and data sheets
+        of the workbook are read.
+        """
+        return file_parser.EXCELFileParser(
+            file_path=self._file,
+            header_length=self._header_length,
+            sheet_filter='^({}|{})$'.format(re.escape(self.HEADER_SHEET),
+                                            re.escape(self.DATA_SHEET)))
 
     def read_file(self):
         self._date_list = self._get_date_list()
@@ -25,11 +41,11 @@ class XLSHannaFileReader(TimeSeriesFileReader):
 
     @property
     def header_info(self):
-        return self.file_content[' Lot Info ']
+        return self.file_content[self.HEADER_SHEET]
 
     @property
     def data_sheet(self):
-        return self.file_content[' Log data - 1']
+        return self.file_content[self.DATA_SHEET]
 
     def _read_file_header(self):
         """
@@ -42,12 +58,18 @@ class XLSHannaFileReader(TimeSeriesFileReader):
                 key = re.sub('^ *', '', row[0])
                 self.header_content[key] = row[1]
 
-    def _get_date_list(self) -> date_list:
-        date_list = [d[0] for d in self.data_sheet[1:]]
-        time_list = [datetime.time(d[1].hour, d[1].minute, d[1].second) for d in self.data_sheet[1:]]
-        date_time = [datetime.datetime(d.year, d.month, d.day, t.hour, t.minute, t.second)
-                     for d, t in zip(date_list, time_list)]
-        return date_time
+    def _get_date_list(self) -> pd.DatetimeIndex:
+        """
+        Combine the date and time columns of the data sheet. The time of
+        the date column and the date of the time column are dropped.
+        """
+        dates = pd.to_datetime([d[0] for d in self.data_sheet[1:]]).normalize()
+        # The time cells are read as datetime.datetime from xls files and
+        # as datetime.time from xlsx files.
+        times = pd.to_timedelta([
+            str(d[1].time() if isinstance(d[1], datetime.datetime) else d[1])
+            for d in self.data_sheet[1:]])
+        return (dates + times).astype('datetime64[ns]')
 
     def _read_file_data(self):
         """
@@ -5,13 +5,16 @@ __date__ = '2018-04-08'
 __description__ = " "
 __version__ = '1.0'
 
+import io
 from typing import List, Tuple
 
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 
-from hydsensread.file_reader.abstract_file_reader import TimeSeriesFileReader, date_list, LineDefinition
+from hydsensread.file_parser import parse_datetime_columns
+from hydsensread.file_parser.datetime_parser import HYDROLAB_DATETIME_FORMATS
+from hydsensread.file_reader.abstract_file_reader import TimeSeriesFileReader, LineDefinition
 
 DATA_HEADER = 'data_header'
 PROBE_ID = 'probe_id'
@@ -20,13 +23,18 @@ SETUP_DATE = 'Setup Date (YYYY-MM-DD)'
 SETUP_TIME = 'Setup Time (HH:MM:SS)'
 
 _START_DATA_WO_DATES = 2
+# Values written by the probe when a measurement is missing.
+_MISSING_VALUES = ['#', 'NAN']
 
 
 class TXTHydrolabFileReader(TimeSeriesFileReader):
 
-    def __init__(self, file_path: str = None, header_length: int = 11):
-        super().__init__(file_path, header_length, encoding='cp1252')
+    def __init__(self, file_path: str = None, header_length: int = 11,
+                 keep_raw: bool = True):
         self.data_header_index = 0
+        self._data_block = None
+        super().__init__(file_path, header_length, encoding='cp1252',
+                         keep_raw=keep_raw)
 
     @property
     def data_as_list(self) -> list:
@@ -42,15 +50,34 @@ class TXTHydrolabFileReader(TimeSeriesFileReader):
     def data_header(self, value: list):
         self.header_content[DATA_HEADER] = value
 
-    def _get_date_list(self) -> date_list:
-        dates = []
-        for i in self.data_as_list:
-            try:
-                dates.append(pd.Timestamp("{} {}".format(i[0], i[1])))
-            except IndexError:
-                pass
-
-        return dates
+    def _get_date_list(self) -> pd.DatetimeIndex:
+        if self._data_block is None:
+            self._data_block = self._read_data_block()
+        return parse_datetime_columns(self._data_block[0].values,
+                                      self._data_block[1].values,
+                                      formats=HYDROLAB_DATETIME_FORMATS)
+
+    def _read_data_block(self) -> pd.DataFrame:
+        """
+        Parse the data block of the file in a single pass, with one column
+        per value of the data header. The date and time columns are kept as
+        strings and the missing values are set to NaN.
+        """
+        data_head = self.file_content[self.data_header_index].replace('"', '').split(',')
+        col_indexes = [i for i, name in enumerate(data_head) if name != '']
+        data_lines = [line for line in self.file_content[self.data_header_index + 3:]
+                      if ',' in line]
+        data_block = pd.read_csv(io.StringIO('\n'.join(data_lines)),
+                                 header=None,
+                                 usecols=col_indexes,
+                                 dtype={col_indexes[0]: str, col_indexes[1]: str},
+                                 na_values=_MISSING_VALUES,
+                                 engine='c')
+        # Any other value that is not a number is considered missing too.
+        for col in col_indexes[_START_DATA_WO_DATES:]:
+            data_block[col] = pd.to_numeric(data_block[col], errors='coerce')
+        data_block.columns = range(len(col_indexes))
+        return data_block
 
     def read_file(self):
         self._set_data_header_index()
@@ -86,12 +113,12 @@ class TXTHydrolabFileReader(TimeSeriesFileReader):
             self.header_content[SETUP_TIME]))
 
     def _set_data_header_index(self):
-        for i in self.file_content:
-            row = i.split(',')
-            if row[0].lower() == '"date"':
+        for i, line in enumerate(self.file_content):
+            if line.split(',')[0].lower() == '"date"':
+                self.data_header_index = i
                 break
-            else:
-                self.data_header_index += 1
+        else:
+            self.data_header_index = len(self.file_content)
 
     def _read_file_data_header(self):
         data_head = self.file_content[self.data_header_index].replace('"', '').split(',')
@@ -100,33 +127,21 @@ class TXTHydrolabFileReader(TimeSeriesFileReader):
         self.data_header = ["{} ({})".format(i, j) for i, j in data_header if i != '']
 
     def _read_file_data(self):
-        datas = []
-        # iterate through row
-        for row in self.data_as_list:
-            try:
-                row_content = []
-                # iterate through values
-                for val in [i.replace('"', '') for i in row[_START_DATA_WO_DATES:]]:
-                    if val != '':
-                        if val not in ['#', 'NAN']:
-                            row_content.append(float(val))
-                        else:
-                            row_content.append(np.nan)
-                datas.append(row_content[:len(self.data_header[_START_DATA_WO_DATES:])])
-            except:
-                pass
-        self._site_of_interest.records = pd.DataFrame(data=datas,
-                                                      index=self._date_list,
-                                                      columns=self.data_header[_START_DATA_WO_DATES:])
-        print(self.records.dtypes)
-
-
+        columns = self.data_header[_START_DATA_WO_DATES:]
+        values = self._data_block.values[:, _START_DATA_WO_DATES:].astype(float)
+        # The names of the data header already contain the units.
+        self._site_of_interest.set_time_series(
+            self._date_list,
+            [(name, None, values[:, i]) for i, name in enumerate(columns)],
+            name_format='{}')
+        self._data_block = None
 
 
 class CGC_HydrolabFiles(TXTHydrolabFileReader):
 
-    def __init__(self, file_path: str = None, header_length: int = 11):
-        super().__init__(file_path, header_length)
+    def __init__(self, file_path: str = None, header_length: int = 11,
+                 keep_raw: bool = True):
+        super().__init__(file_path, header_length, keep_raw=keep_raw)
 
     def plot(self, *args, **kwargs) -> Tuple[
         plt.Figure, List[plt.Axes]]:
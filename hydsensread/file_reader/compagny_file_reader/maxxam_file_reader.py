@@ -6,11 +6,82 @@ __description__ = " "
 __version__ = '1.0'
 
 import datetime
+import os
+import os.path as osp
 import re
 import warnings
+from collections import namedtuple
 
+from hydsensread import file_parser
 from hydsensread.file_reader.abstract_file_reader import GeochemistryFileReader, Sample
 
+# Layout of a results sheet, found in a single pass over its rows:
+# - sample_columns: indexes of the columns holding a sample, in order
+# - analysis_types: analysis types of the sheet, in order of appearance
+# - analysis_sections: list of (analysis type, result rows) for the rows
+#   before the end of the results
+ResultsSheetIndex = namedtuple('ResultsSheetIndex', [
+    'sample_name_row_index', 'unit_column_index',
+    'detection_limit_column_index', 'report_date', 'sample_columns',
+    'analysis_types', 'analysis_sections'])
+
+
+class AnalysisTypeRegistry(object):
+    """
+    In-memory registry of the analysis types found in the Maxxam reports.
+
+    The registry is loaded once from its file, if any. The new analysis
+    types are only added in memory and are written to the file in a batch
+    when save is called. When file_path is None, the registry is not
+    persisted at all.
+    """
+
+    def __init__(self, file_path: str = None):
+        self.file_path = file_path
+        self._analysis_types = dict.fromkeys(self._read_file())
+        self._unsaved = False
+
+    def __contains__(self, analysis_type) -> bool:
+        return analysis_type in self._analysis_types
+
+    def __iter__(self):
+        return iter(self._analysis_types)
+
+    def __len__(self) -> int:
+        return len(self._analysis_types)
+
+    def add(self, analysis_type: str):
+        if analysis_type not in self._analysis_types:
+            self._analysis_types[analysis_type] = None
+            self._unsaved = True
+
+    def save(self):
+        """
+        Write the analysis types in the file of the registry, if any.
+
+        The analysis types added to the file by other processes since it was
+        loaded are kept. The file is replaced atomically, so that it is never
+        read half written. There is no lock between the read of the file and
+        its replacement: when many processes save the same registry at the
+        same time, the last writer wins and the analysis types added by the
+        others in the meantime can be lost.
+        """
+        if self.file_path is None or not self._unsaved:
+            return
+        for analysis_type in self._read_file():
+            self._analysis_types.setdefault(analysis_type, None)
+        tmp_file = '{}.{}.tmp'.format(self.file_path, os.getpid())
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.writelines(analysis_type + "\n" for analysis_type in self._analysis_types)
+        os.replace(tmp_file, self.file_path)
+        self._unsaved = False
+
+    def _read_file(self) -> list:
+        if self.file_path is None or not osp.exists(self.file_path):
+            return []
+        with open(self.file_path, 'r', encoding='utf-8') as f:
+            return [line.rstrip("\n") for line in f if line.strip()]
+
 
 class XSLMaxxamFileReader(GeochemistryFileReader):
     IGNORE_CONTENT = ["LDR = Limite de détection rapportée",
@@ -18,9 +89,21 @@ class XSLMaxxamFileReader(GeochemistryFileReader):
                       "N/A = Non Applicable",
                       "Les résultats ne se rapportent qu’aux échantillons soumis pour analyse",
                       "Duplicata de laboratoire"]
+    RESULTS_SHEET_REGEX = r"(?i)result.*"
 
-    def __init__(self, file_path: str = None, header_length: int = 12):
-        super().__init__(file_path, header_length)
+    def __init__(self, file_path: str = None, header_length: int = 12,
+                 keep_raw: bool = True,
+                 analysis_type_registry: AnalysisTypeRegistry = None):
+        """
+        :param analysis_type_registry: registry where the analysis types
+        found in the file are added. By default, the reader has its own
+        registry, which is not persisted.
+        """
+        self._results_sheets_index = {}
+        if analysis_type_registry is None:
+            analysis_type_registry = AnalysisTypeRegistry()
+        self.analysis_type_registry = analysis_type_registry
+        super().__init__(file_path, header_length, keep_raw=keep_raw)
         self.maxxam_file = None
         self.command_number = None
         assert self.file_extension in self.XLS_FILES_TYPES, "Bad file type"
@@ -30,6 +113,16 @@ class XSLMaxxamFileReader(GeochemistryFileReader):
         self._sample_name_row_index = 0
         self.analysis_methode = []
 
+    def _set_file_reader(self) -> file_parser.EXCELFileParser:
+        """
+        Extension of the base class method. Only the results sheets of the
+        workbook are read.
+        """
+        return file_parser.EXCELFileParser(
+            file_path=self._file,
+            header_length=self._header_length,
+            sheet_filter=self.RESULTS_SHEET_REGEX)
+
     def _read_file_header(self):
         """
         implementation of the base class abstract method
@@ -41,15 +134,14 @@ class XSLMaxxamFileReader(GeochemistryFileReader):
         implementation of the base class abstract method
         """
         for sheets in self.get_results_sheet():
-            self._update_sheet_data(sheets)
             self._enter_results(sheets)
+        self._results_sheets_index = {}
 
     def _read_file_data_header(self):
         """
         implementation of the base class abstract method
         """
         for sheets in self.get_results_sheet():
-            self._update_sheet_data(sheets)
             self._create_samples_sites(sheets)
 
     def _update_sheet_data(self, sheet_name):
@@ -57,7 +149,7 @@ class XSLMaxxamFileReader(GeochemistryFileReader):
         self._get_report_date(sheet_name)
 
     def get_results_sheet(self):
-        return [sheet for sheet in self.file_content.keys() if re.search(r"result.*", sheet.lower())]
+        return [sheet for sheet in self.file_content.keys() if re.search(self.RESULTS_SHEET_REGEX, sheet)]
 
     def create_analysis_for_sample(self, sample_name: str,
                                    analysis_type: str,
@@ -69,33 +161,21 @@ class XSLMaxxamFileReader(GeochemistryFileReader):
                         visit_date=sampling_date,
                         lab_sample_name=maxxam_name,
                         sample_type=samp_type,
-                        analysis_type=analysis_type, project_name=self.project)
+                        analysis_type=analysis_type, project_name=self.project,
+                        table=self.sample_table)
 
         self._site_of_interest[sample_name][analysis_type] = sample
 
-    def _add_analysis_type_in_txt_database(self, analysis_type: str):
-        try:
-            with open('maxxam_analysis_type.txt', 'r+', encoding='utf-8') as _file:
-                in_file = False
-                for line in _file:
-                    if analysis_type in line:
-                        in_file = True
-                        break
-                if in_file == False and analysis_type not in self.IGNORE_CONTENT:
-                    _file.writelines(analysis_type + "\n")
-        except FileNotFoundError:
-            f = open('maxxam_analysis_type.txt', 'w')
-            f.close()
-            self._add_analysis_type_in_txt_database(analysis_type)
-
     def _get_analysis_type(self):
         for result_sheets in self.get_results_sheet():
             for row in self.file_content[result_sheets][11:]:
                 if type(row[0]) == str and \
                                 row[1:] == [None for i in range(len(row) - 1)]:
-                    self._add_analysis_type_in_txt_database(row[0])
-                    if row[0] not in self.IGNORE_CONTENT and row[0] not in self.analysis_methode:
-                        self.analysis_methode.append(row[0])
+                    if row[0] not in self.IGNORE_CONTENT:
+                        self.analysis_type_registry.add(row[0])
+                        if row[0] not in self.analysis_methode:
+                            self.analysis_methode.append(row[0])
+        self.analysis_type_registry.save()
 
     def _get_report_date(self, sheet_name):
         for row in self.file_content[sheet_name][0:9]:
@@ -116,10 +196,19 @@ class XSLMaxxamFileReader(GeochemistryFileReader):
                         self._detection_limit_column_index = cell_num
                         break
 
-    def _create_samples_sites(self, sheet_name):
-        # search for the current sheet
-        for col_ind, cells in enumerate(
-                self.file_content[sheet_name][self._sample_name_row_index]):
+    def _get_results_sheet_index(self, sheet_name) -> ResultsSheetIndex:
+        """
+        Index the layout of a results sheet in a single pass over its rows.
+        The index is computed once per sheet and shared by the creation of
+        the samples and the entry of the results.
+        """
+        if sheet_name in self._results_sheets_index:
+            return self._results_sheets_index[sheet_name]
+        self._update_sheet_data(sheet_name)
+        sheet = self.file_content[sheet_name]
+
+        sample_columns = []
+        for col_ind, cells in enumerate(sheet[self._sample_name_row_index]):
             cells_content = str(cells).lower()
             # line header indicates this column contain quality Control samples name
             if re.search(r"lot.*[cq]{2}.*", cells_content):
@@ -130,55 +219,83 @@ class XSLMaxxamFileReader(GeochemistryFileReader):
                 pass
             # else, treat header as a sample name
             elif not re.search(r"(ldr|lot.*|unit.*|none)", cells_content):
-                samp_type = 'echantillon'
-                sampling_date = self.file_content[sheet_name][self._sample_name_row_index - 2][col_ind]
-                maxxam_name = self.file_content[sheet_name][self._sample_name_row_index - 3][col_ind]
-                # Internal maxxam duplicate
-                if re.search(r".*dup.*de.*lab.*", cells_content):
-                    samp_type = 'dup de laboratoire'
-                # for the current sheet, take the analysis method used for the samples
-                for row in self.file_content[sheet_name][self._sample_name_row_index + 1:]:
-                    if row[0] in self.analysis_methode:
-                        self.create_analysis_for_sample(sample_name=cells,
-                                                        analysis_type=row[0],
-                                                        sampling_date=sampling_date,
-                                                        maxxam_name=maxxam_name, samp_type=samp_type)
+                sample_columns.append(col_ind)
 
-    def _enter_results(self, sheet_name):
-        # pour chaque échantillon créé
-        for samp in list(self._site_of_interest.keys()):
-            samp_col_index = self._get_sample_column_index(sheet_name, samp)
-            ana_type = None
-            # pour chaque feuilles de résultats
-            for row in self.file_content[sheet_name][self._sample_name_row_index + 1:]:
-                # la ligne est l'entête du type d'analyse
-                if row[0] in self.analysis_methode:
+        analysis_types = []
+        analysis_sections = []
+        ana_type = None
+        section_rows = []
+        end_of_results = False
+        for row in sheet[self._sample_name_row_index + 1:]:
+            # la ligne est l'entête du type d'analyse
+            if row[0] in self.analysis_methode:
+                if row[0] not in analysis_types:
+                    analysis_types.append(row[0])
+                if not end_of_results:
+                    if section_rows:
+                        analysis_sections.append((ana_type, section_rows))
                     ana_type = row[0]
-                # c'est la fin
-                elif row[0] is None and row[1] is None:
-                    break
-                # ce sont des résultats
-                else:
-                    # the sample is present in the current sheet
-                    if samp_col_index is not None:
-                        parameter = row[0]
-                        param_unit = row[self._unit_column_index]
-                        detect_limit = row[self._detection_limit_column_index]
-                        value = row[samp_col_index]
-                        sampling_date = self.get_sample_object_by_name_and_analysis(samp, ana_type).visit_date
-                        report_date = self.report_date
-                        self.get_sample_object_by_name_and_analysis(samp, ana_type). \
-                            create_complete_record(sampling_date, parameter, param_unit, value, detect_limit,
-                                                   report_date, ana_type)
+                    section_rows = []
+            # c'est la fin
+            elif row[0] is None and row[1] is None:
+                end_of_results = True
+            # ce sont des résultats
+            elif not end_of_results:
+                section_rows.append(row)
+        if section_rows:
+            analysis_sections.append((ana_type, section_rows))
+
+        index = ResultsSheetIndex(self._sample_name_row_index,
+                                  self._unit_column_index,
+                                  self._detection_limit_column_index,
+                                  self.report_date,
+                                  sample_columns,
+                                  analysis_types,
+                                  analysis_sections)
+        self._results_sheets_index[sheet_name] = index
+        return index
+
+    def _create_samples_sites(self, sheet_name):
+        index = self._get_results_sheet_index(sheet_name)
+        sheet = self.file_content[sheet_name]
+        for col_ind in index.sample_columns:
+            cells = sheet[index.sample_name_row_index][col_ind]
+            samp_type = 'echantillon'
+            sampling_date = sheet[index.sample_name_row_index - 2][col_ind]
+            maxxam_name = sheet[index.sample_name_row_index - 3][col_ind]
+            # Internal maxxam duplicate
+            if re.search(r".*dup.*de.*lab.*", str(cells).lower()):
+                samp_type = 'dup de laboratoire'
+            # for the current sheet, take the analysis method used for the samples
+            for analysis_type in index.analysis_types:
+                self.create_analysis_for_sample(sample_name=cells,
+                                                analysis_type=analysis_type,
+                                                sampling_date=sampling_date,
+                                                maxxam_name=maxxam_name, samp_type=samp_type)
+
+    def _enter_results(self, sheet_name):
+        index = self._get_results_sheet_index(sheet_name)
+        sample_names = self.file_content[sheet_name][index.sample_name_row_index]
+        # column of each sample present in the current sheet
+        samples_column = {}
+        for col_ind in index.sample_columns:
+            samp = sample_names[col_ind]
+            if samp in self._site_of_interest and samp not in samples_column:
+                samples_column[samp] = col_ind
+        # les résultats de chaque type d'analyse sont entrés en bloc
+        for ana_type, rows in index.analysis_sections:
+            parameters = [row[0] for row in rows]
+            params_unit = [row[index.unit_column_index] for row in rows]
+            detect_limits = [row[index.detection_limit_column_index] for row in rows]
+            for samp, samp_col_index in samples_column.items():
+                sample = self.get_sample_object_by_name_and_analysis(samp, ana_type)
+                sample.create_complete_records(sample.visit_date, parameters, params_unit,
+                                               [row[samp_col_index] for row in rows],
+                                               detect_limits, index.report_date, ana_type)
 
     def get_sample_object_by_name_and_analysis(self, sample_name, ana_method) -> Sample:
         return self._site_of_interest[sample_name][ana_method]
 
-    def _get_sample_column_index(self, sheet_name, samp_name) ->int:
-        for col, cells in enumerate(self.file_content[sheet_name][self._sample_name_row_index]):
-            if cells == samp_name:
-                return col
-
     def _add_lot_qc_sample(self, sheet_name, column_index):
         """
         deprecated method left because it can be usefull...
@@ -9,18 +9,25 @@
 
 # ---- Standard imports
 import datetime
+import itertools
 import re
 import warnings
 from collections import defaultdict
-from typing import List, Tuple
+from typing import Iterable, Iterator, List, Tuple
 import os.path as osp
+from xml.etree import ElementTree as ET
 
 # ---- Third party imports
 import numpy as np
+import pandas as pd
 from matplotlib import pyplot as plt
-from pandas import Timestamp
 
 # ---- Local imports
+from hydsensread import file_parser
+from hydsensread.file_parser import parse_datetime_columns
+from hydsensread.file_parser.datetime_parser import (
+    SOLINST_CSV_DATETIME_FORMATS, SOLINST_LEV_DATETIME_FORMATS,
+    SOLINST_XLE_DATETIME_FORMATS)
 from hydsensread.file_reader.abstract_file_reader import (
     TimeSeriesFileReader, LineDefinition)
 
@@ -30,7 +37,7 @@ class SolinstFileReader(object):
     A reader for Solinst '.lev', '.xle', or '.csv' files.
     """
 
-    def __new__(cls, file_path, wait_read=False):
+    def __new__(cls, file_path, wait_read=False, keep_raw=True):
         """
         Parameters
         ----------
@@ -42,6 +49,10 @@ class SolinstFileReader(object):
             read on instantiation of the reader. If 'False', use the
             'read_file' method of the reader to read the content of the file
             when needed.
+        keep_raw : bool
+            A boolean that indicates whether the raw content of the file
+            should be kept in memory once the data are read. If 'False',
+            only the parsed data are kept and the reader is cheap to pickle.
 
         Returns
         -------
@@ -57,11 +68,14 @@ class SolinstFileReader(object):
         root, ext = osp.splitext(file_path)
         ext = ext[1:]
         if ext in TimeSeriesFileReader.CSV_FILES_TYPES:
-            return CSVSolinstFileReader(file_path, wait_read=wait_read)
+            return CSVSolinstFileReader(
+                file_path, wait_read=wait_read, keep_raw=keep_raw)
         elif ext == 'lev':
-            return LEVSolinstFileReader(file_path, wait_read=wait_read)
+            return LEVSolinstFileReader(
+                file_path, wait_read=wait_read, keep_raw=keep_raw)
         elif ext == 'xle':
-            return XLESolinstFileReader(file_path, wait_read=wait_read)
+            return XLESolinstFileReader(
+                file_path, wait_read=wait_read, keep_raw=keep_raw)
         else:
             warnings.warn("Unknown file extension for this compagny")
 
@@ -146,15 +160,15 @@ class SolinstFileReaderBase(TimeSeriesFileReader):
 
     # ---- Private API
     def _format_data_units(self):
-        columns_map = {}
-        for column in self.records.columns:
-            column_split = column.split('_')
-            units = column_split[-1].replace(' ', '').lower()
-            if units in ['°c', 'degc', 'degree_celsius', 'celsius', 'degreec']:
-                columns_map[column] = '_'.join(column_split[:-1]) + '_degC'
-            else:
-                columns_map[column] = column
-        self.records.rename(columns_map, axis='columns', inplace=True)
+        self.sites.rename_columns(self._format_column_units)
+
+    @staticmethod
+    def _format_column_units(column: str) -> str:
+        column_split = column.split('_')
+        units = column_split[-1].replace(' ', '').lower()
+        if units in ['°c', 'degc', 'degree_celsius', 'celsius', 'degreec']:
+            return '_'.join(column_split[:-1]) + '_degC'
+        return column
 
     def undo_altitude_correction(self):
         """
@@ -261,25 +275,15 @@ class LEVSolinstFileReader(SolinstFileReaderBase):
     DATA_CHANNEL_STRING = ".*CHANNEL {} from data header.*"
 
     def __init__(self, file_path: str = None, header_length: int = 10,
-                 wait_read: bool = False):
+                 wait_read: bool = False, keep_raw: bool = True):
         super().__init__(file_path, header_length, encoding='cp1252',
-                         wait_read=wait_read)
+                         wait_read=wait_read, keep_raw=keep_raw)
 
     # ---- AbstractFileReader API
-    def _get_date_list(self) -> List[datetime.datetime]:
+    def _get_date_list(self) -> pd.DatetimeIndex:
         """Retrieve the datetime data from the file content."""
-        sep = self.file_content[self._header_length + 1][4]
-        datetime_list = []
-        for lines in self.file_content[self._header_length + 1:-1]:
-            sep_line = lines.split(" ")
-            try:
-                _date_time = datetime.datetime.strptime(
-                    "{} {}".format(sep_line[0], sep_line[1]),
-                    '%Y{}%m{}%d %H:%M:%S.%f'.format(sep, sep))
-            except ValueError:
-                break
-            datetime_list.append(_date_time)
-        return datetime_list
+        dates, self._data_values = self._tokenize_data_block()
+        return dates
 
     # ---- SolinstFileReaderBase API
     def _update_header_lentgh(self):
@@ -339,60 +343,120 @@ class LEVSolinstFileReader(SolinstFileReaderBase):
     def _get_number_of_channels(self) -> int:
         return int(self._get_instrument_info(r" *Channel *=.*"))
 
+    def _get_channel_info(self, channel_num: int) -> Tuple[str, str]:
+        """
+        Return the parameter name and units of the channel scraped from
+        the header of the file.
+        """
+        param = None
+        param_unit = None
+        data_channel_string = self.DATA_CHANNEL_STRING.format(channel_num + 1)
+        for row_num, row in enumerate(
+                self.file_content[:self._header_length]):
+            if re.search(data_channel_string, row):
+                next_row = self.file_content[row_num + 1].strip()
+                if re.search(r".*identification.*", next_row.lower()):
+                    param = next_row.split("=")[-1].strip()
+                next_row = self.file_content[row_num + 2].strip()
+                if re.search(r".*unit.*", next_row.lower()):
+                    param_unit = next_row.split("=")[-1].strip()
+                elif re.search(r".*reference.*", next_row.lower()):
+                    # For Solinst loggers older than the Gold series.
+                    param_unit = next_row.split("=")[-1]
+                    param_unit = param_unit.split(" ")[-1].strip()
+        return param, param_unit
+
+    def _tokenize_data_block(self) -> Tuple[pd.DatetimeIndex, np.ndarray]:
+        """
+        Tokenize the data block of the file in a single pass.
+
+        Each data line is split only once and its date, time and channel
+        values are written directly in preallocated NumPy arrays. The
+        date and time columns are then parsed in a single vectorized call.
+
+        Returns
+        -------
+        pd.DatetimeIndex
+            The timestamps of the readings.
+        np.ndarray
+            A 2D float array with one column per channel.
+        """
+        data_block = self.file_content[self._header_length + 1:-1]
+        nchannels = self._get_number_of_channels()
+
+        date_column = np.empty(len(data_block), dtype=object)
+        time_column = np.empty(len(data_block), dtype=object)
+        values = np.empty((len(data_block), nchannels), dtype=float)
+        nrows = 0
+        for line in data_block:
+            tokens = line.split()
+            try:
+                values[nrows] = tokens[2:nchannels + 2]
+            except ValueError:
+                break
+            date_column[nrows] = tokens[0]
+            time_column[nrows] = tokens[1]
+            nrows += 1
+        dates = parse_datetime_columns(
+            date_column[:nrows], time_column[:nrows],
+            formats=SOLINST_LEV_DATETIME_FORMATS)
+        return dates, values[:nrows]
+
     def _get_data(self):
+        time_series = []
         for channel_num in range(self._get_number_of_channels()):
-            param = None
-            param_unit = None
-            for row_num, row in enumerate(
-                    self.file_content[:self._header_length]):
-                data_channel_string = (
-                    self.DATA_CHANNEL_STRING.format(channel_num + 1))
-                if re.search(data_channel_string, row):
-                    next_row = self.file_content[row_num + 1].strip()
-                    if re.search(r".*identification.*", next_row.lower()):
-                        param = next_row.split("=")[-1].strip()
-                    next_row = self.file_content[row_num + 2].strip()
-                    if re.search(r".*unit.*", next_row.lower()):
-                        param_unit = next_row.split("=")[-1].strip()
-                    elif re.search(r".*reference.*", next_row.lower()):
-                        # For Solinst loggers older than the Gold series.
-                        param_unit = next_row.split("=")[-1]
-                        param_unit = param_unit.split(" ")[-1].strip()
-
-            values = []
-            for lines in self.file_content[self._header_length + 1:-1]:
-                sep_line = [
-                    data for data in list(lines.split(" ")) if data != '']
-                values.append(float(sep_line[channel_num + 2]))
-            self.sites.create_time_serie(
-                param, param_unit, self._date_list, values)
+            param, param_unit = self._get_channel_info(channel_num)
+            time_series.append(
+                (param, param_unit, self._data_values[:, channel_num]))
+        self.sites.set_time_series(self._date_list, time_series)
+        self._data_values = None
 
 
 class XLESolinstFileReader(SolinstFileReaderBase):
     CHANNEL_DATA_HEADER = "Ch{}_data_header"
 
     def __init__(self, file_path: str = None, header_length: int = 10,
-                 wait_read: bool = False):
-        super().__init__(file_path, header_length, wait_read=wait_read)
+                 wait_read: bool = False, iterparse: bool = True,
+                 keep_raw: bool = True):
+        """
+        :param iterparse: if True, the content of the file is streamed with
+        ElementTree.iterparse and each 'Log' element is released as soon as
+        it is consumed, so that the memory used to read the file stays flat.
+        Otherwise, the whole ElementTree is loaded in memory.
+        """
+        self._iterparse = iterparse
+        self.file_root = None
+        super().__init__(file_path, header_length, wait_read=wait_read,
+                         keep_raw=keep_raw)
+
+    def _set_file_reader(self) -> file_parser.XMLFileParser:
+        """Extension of the base class method."""
+        return file_parser.XMLFileParser(
+            file_path=self._file, iterparse=self._iterparse)
 
     def read_file(self):
         """Extension of the base class abstract method."""
-        self.file_root = self.file_content.getroot()
+        if self.file_reader.iterparse_mode:
+            self.file_root = None
+            logs = self._stream_logs()
+        else:
+            self.file_root = self.file_content.getroot()
+            logs = self.file_root.iter('Log')
+        self._dates, self._data_values = self._read_logs(logs)
         super().read_file()
 
+    def release_raw_content(self):
+        """Extension of the base class method."""
+        super().release_raw_content()
+        self.file_root = None
+
     # ---- AbstractFileReader API
-    def _get_date_list(self) -> list:
+    def _get_date_list(self) -> pd.DatetimeIndex:
         """
         get a list of timestamp present in the file
         :return:
         """
-        datetime_list = [datetime.datetime.strptime(
-            "{} {}:{}".format(_data.find('Date').text,
-                              _data.find('Time').text,
-                              _data.find('ms').text),
-            '%Y/%m/%d %H:%M:%S:%f'
-            ) for _data in self.file_root.iter('Log')]
-        return datetime_list
+        return self._dates
 
     # ---- SolinstFileReaderBase API
     def _create_visited_date(self) -> datetime:
@@ -400,7 +464,7 @@ class XLESolinstFileReader(SolinstFileReaderBase):
         Create a datetime object by reading the file header.
         The visited date is equal to the creation date of the file
         """
-        file_info = self.file_root.find('File_info')
+        file_info = self._find_header('File_info')
 
         date_str = file_info.find('Date').text
         time_str = file_info.find('Time').text
@@ -410,79 +474,178 @@ class XLESolinstFileReader(SolinstFileReaderBase):
         return datetime_obj
 
     def _get_site_name(self) -> str:
-        return self.file_root.find(
+        return self._find_header(
             'Instrument_info_data_header').find('Location').text
 
     def _get_serial_number(self):
-        return self.file_root.find(
+        return self._find_header(
             'Instrument_info').find('Serial_number').text
 
     def _get_project_name(self):
-        return self.file_root.find(
+        return self._find_header(
             'Instrument_info_data_header').find('Project_ID').text
 
     def _get_number_of_channels(self):
-        return int(self.file_root.find(
+        return int(self._find_header(
             'Instrument_info').find('Channel').text)
 
     def _get_model_number(self):
-        return self.file_root.find('Instrument_info').find('Model_number').text
+        return self._find_header('Instrument_info').find('Model_number').text
 
     def _get_battery_level(self):
-        return self.file_root.find(
+        return self._find_header(
             'Instrument_info').find('Battery_level').text
 
+    def _get_number_of_logs(self) -> int:
+        try:
+            return int(self._find_header(
+                'Instrument_info_data_header').find('Num_log').text)
+        except (AttributeError, TypeError, ValueError):
+            return 0
+
     # ---- Private API
+    def _find_header(self, tag: str) -> ET.Element:
+        """
+        Return the header block of the file with the given tag.
+
+        The header blocks are only available once the file was read and
+        until its raw content is released.
+        """
+        if self.file_root is None:
+            raise ValueError(
+                "The header of the file is not available: the file was not "
+                "read yet or its raw content was released.")
+        return self.file_root.find(tag)
+
+    def _stream_logs(self) -> Iterator[ET.Element]:
+        """
+        Stream the 'Log' elements of the file with iterparse.
+
+        The header blocks (File_info, Instrument_info, ChN_data_header, ...)
+        are kept attached to self.file_root as they stream past, while each
+        'Log' element is cleared and detached from its parent once consumed.
+        """
+        parents = []
+        for event, element in self.file_reader.iterparse(
+                events=('start', 'end')):
+            if event == 'start':
+                if self.file_root is None:
+                    self.file_root = element
+                parents.append(element)
+                continue
+            parents.pop()
+            if element.tag == 'Log':
+                yield element
+                element.clear()
+                # The 'Log' elements are usually grouped under a 'Data'
+                # block, but we don't rely on it.
+                if parents:
+                    parents[-1].remove(element)
+
+    def _read_logs(self, logs: Iterable[ET.Element]
+                   ) -> Tuple[pd.DatetimeIndex, np.ndarray]:
+        """
+        Read the timestamp and the values of every channel of the 'Log'
+        elements in a single pass.
+
+        Returns
+        -------
+        pd.DatetimeIndex
+            The timestamps of the readings.
+        np.ndarray
+            A 2D float array with one column per channel.
+        """
+        datetime_column = None
+        values = None
+        nrows = 0
+        for log in logs:
+            if values is None:
+                # The header blocks are always located before the data in
+                # the file, so they are available at this point even when
+                # the content of the file is streamed.
+                nchannels = self._get_number_of_channels()
+                channel_tags = [
+                    "ch{}".format(i + 1) for i in range(nchannels)]
+                size = max(self._get_number_of_logs(), 1)
+                datetime_column = np.empty(size, dtype=object)
+                values = np.empty((size, nchannels), dtype=float)
+            if nrows == len(values):
+                datetime_column = np.resize(datetime_column, 2 * nrows)
+                values = np.resize(values, (2 * nrows, values.shape[1]))
+
+            fields = {child.tag: child.text for child in log}
+            datetime_column[nrows] = "{} {}.{}".format(
+                fields['Date'], fields['Time'], fields['ms'])
+            # A coma is used as decimal separator in some files.
+            values[nrows] = [
+                fields[tag].replace(',', '.') for tag in channel_tags]
+            nrows += 1
+
+        if values is None:
+            datetime_column = np.empty(0, dtype=object)
+            values = np.empty((0, self._get_number_of_channels()))
+        dates = parse_datetime_columns(
+            datetime_column[:nrows], formats=SOLINST_XLE_DATETIME_FORMATS)
+        return dates, values[:nrows]
+
     def _get_data(self) -> None:
         """
         create time serie and update the SensorPlateform object
         :return:
         """
+        time_series = []
         for channels in range(self._get_number_of_channels()):
             channel_name = self.CHANNEL_DATA_HEADER.format(channels + 1)
-            channel_parammeter = self.file_root.find(
+            channel_parammeter = self._find_header(
                 channel_name).find('Identification').text
-            channel_unit = self.file_root.find(channel_name).find('Unit').text
-            ch_selector = "ch{}".format(channels + 1)
-            try:
-                values = [float(d.find(ch_selector).text)
-                          for d in self.file_root.iter('Log')]
-            except ValueError:
-                # This probably means that a coma is used as decimal separator.
-                values = [float(d.find(ch_selector).text.replace(',', '.'))
-                          for d in self.file_root.iter('Log')]
-
-            self._site_of_interest.create_time_serie(
-                channel_parammeter, channel_unit, self._date_list, values)
+            channel_unit = self._find_header(channel_name).find('Unit').text
+            time_series.append(
+                (channel_parammeter, channel_unit, self._data_values[:, channels]))
+        self._site_of_interest.set_time_series(self._date_list, time_series)
+        self._dates = None
+        self._data_values = None
 
 
 class CSVSolinstFileReader(SolinstFileReaderBase):
 
     def __init__(self, file_path: str = None, header_length: int = 12,
-                 wait_read: bool = False):
+                 wait_read: bool = False, keep_raw: bool = True):
         self._params_dict = defaultdict(dict)
         self._start_of_data_row_index = header_length
+        self._data_block = None
         super().__init__(file_path, header_length, wait_read=wait_read,
-                         csv_delim_regex="date([;,\t])time")
+                         csv_delim_regex="date([;,\t])time",
+                         keep_raw=keep_raw)
+
+    def _set_file_reader(self) -> file_parser.CSVFileParser:
+        """
+        Extension of the base class method.
+
+        Only the header of the file is read with the csv parser. The data
+        block is parsed in bulk with pandas in _read_data_block.
+        """
+        return file_parser.CSVFileParser(
+            file_path=self._file,
+            header_length=self._header_length,
+            csv_delim_regex=self._csv_delim_regex,
+            header_only=True)
 
     # ---- Base class abstract method implementation
-    def _get_date_list(self) -> list:
+    def _get_date_list(self) -> pd.DatetimeIndex:
         """Retrieve the datetime data from the file content."""
-        data_header = self.file_content[self._start_of_data_row_index]
-        istart = data_header.index('Date')
-        iend = istart + 1
-        fmt = "{} {}"
-        if 'ms' in ''.join(data_header):
-            iend += 1
-            fmt += ".{}"
-
-        datetimes = []
-        for line in self.file_content[self._start_of_data_row_index + 1:]:
-            try:
-                _datetime = Timestamp(fmt.format(*line[istart:iend + 1]))
-            except ValueError:
-                break
-            datetimes.append(_datetime)
+        self._data_block = self._read_data_block()
+        datetime_cols = self._get_datetime_col_indexes()
+        seps = (' ', '.')[:len(datetime_cols) - 1]
+
+        columns = [self._data_block[icol].fillna('').values
+                   for icol in datetime_cols]
+        datetimes = parse_datetime_columns(
+            *columns, seps=seps, formats=SOLINST_CSV_DATETIME_FORMATS,
+            errors='coerce')
+        if datetimes.hasnans:
+            nrows = np.argmax(datetimes.isna())
+            datetimes = datetimes[:nrows]
+            self._data_block = self._data_block.iloc[:nrows]
         self.sites.visit_date = datetimes[-1]
         return datetimes
 
@@ -578,18 +741,52 @@ class CSVSolinstFileReader(SolinstFileReaderBase):
     def _get_data(self):
         """Return the numerical data from the Solinst data file."""
         self._get_parameter_data()
-        data = np.array(self.file_content[self._start_of_data_row_index + 1:])
+        time_series = []
         for parameter in list(self._params_dict.keys()):
             param_unit = self._params_dict[parameter]['unit']
             param_col_index = self._params_dict[parameter]['col_index']
+            values = self._data_block[param_col_index].values.astype(float)
+            time_series.append((parameter, param_unit, values))
+        self._site_of_interest.set_time_series(self._date_list, time_series)
+        self._data_block = None
+
+    def _get_datetime_col_indexes(self) -> List[int]:
+        """
+        Return the indexes of the date, time and, if any, millisecond
+        columns of the data block.
+        """
+        data_header = self.file_content[self._start_of_data_row_index]
+        istart = data_header.index('Date')
+        ncols = 3 if 'ms' in ''.join(data_header) else 2
+        return list(range(istart, istart + ncols))
 
-            values = data[:, param_col_index]
-            values = np.char.replace(np.char.strip(values), ',', '.')
-            values[values == ''] = np.nan
-            values = values.astype(float)
+    def _read_data_block(self) -> pd.DataFrame:
+        """
+        Parse the data block of the file in bulk with the C engine of
+        pandas.read_csv.
 
-            self._site_of_interest.create_time_serie(
-                parameter, param_unit, self._date_list, values)
+        The columns of the returned DataFrame are labeled with their
+        position in the data header. The date and time columns are kept
+        as strings.
+        """
+        data_header = self.file_content[self._start_of_data_row_index]
+        delimiter = self.file_reader.delimiter
+        encoding = self.file_reader.encoding_style
+        skiprows = self._start_of_data_row_index + 1
+
+        # A coma is used as decimal separator in some files, in which case
+        # the delimiter is not a coma.
+        with open(self._file, 'r', encoding=encoding) as csvfile:
+            first_data_line = next(
+                itertools.islice(csvfile, skiprows, None), '')
+        decimal = (',' if delimiter != ',' and ',' in first_data_line
+                   else '.')
+
+        return pd.read_csv(
+            self._file, sep=delimiter, decimal=decimal, header=None,
+            skiprows=skiprows, usecols=range(len(data_header)),
+            dtype={icol: str for icol in self._get_datetime_col_indexes()},
+            skipinitialspace=True, encoding=encoding, engine='c')
 
 
 if __name__ == '__main__':
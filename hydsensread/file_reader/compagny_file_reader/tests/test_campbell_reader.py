@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © HydroSensorReader Project Contributors
+# https://github.com/cgq-qgc/HydroSensorReader
+#
+# This file is part of HydroSensorReader.
+# Licensed under the terms of the MIT License.
+# -----------------------------------------------------------------------------
+
+# ---- Standard imports
+import os
+import os.path as osp
+
+# ---- Third party imports
+import numpy as np
+import pandas as pd
+import pytest
+from pandas import Timestamp
+
+# ---- Local imports
+import hydsensread as hsr
+
+
+# ---- Fixtures
+@pytest.fixture(scope="module")
+def test_files_dir():
+    return osp.join(osp.dirname(__file__), 'files')
+
+
+# ---- Tests
+def test_campbell_toa5_reader(test_files_dir):
+    """Test reading Campbell TOA5 .dat files."""
+    campbell_file = hsr.DATCampbellCRFileReader(
+        osp.join(test_files_dir, 'campbell_toa5_file.dat'))
+
+    sites = campbell_file.sites
+    assert sites.site_name == "F2_XM20170222"
+    assert sites.instrument_serial_number == "2656"
+    assert sites.visit_date == Timestamp('2017-02-24 09:30:00')
+
+    records = campbell_file.records
+    assert len(records) == 4
+    assert len(records.columns) == 15
+    assert records.columns[0] == 'Bat_Volt (volt)'
+    assert records.columns[-1] == 'Ptot_v_Avg (volt)'
+    assert (records.dtypes == float).all()
+
+    assert records.index[0] == Timestamp('2017-02-22 12:30:00')
+    assert records.iloc[0, 0] == 14.88697
+    assert records.iloc[0, -1] == 4.637263
+
+    # The 'NAN' values written by the datalogger are missing values.
+    assert records.index[-1] == Timestamp('2017-02-24 09:30:00')
+    assert records.iloc[-1, 10] == 4.224595
+    assert np.isnan(records.iloc[-1, 11:]).all()
+
+
+def test_remove_duplicates(test_files_dir):
+    """
+    Test that the duplicated timestamps are removed, but not the records
+    repeating the same values at different timestamps.
+    """
+    campbell_file = hsr.DATCampbellCRFileReader(
+        osp.join(test_files_dir, 'campbell_toa5_file.dat'))
+    records = campbell_file.records.iloc[:, :2].copy()
+    records.iloc[:, :] = 1.0
+    records.iloc[2, :] = 3.0
+    # The second timestamp is duplicated and the records are not sorted.
+    records = records.iloc[[1, 0, 1, 2, 3]].copy()
+    records.iloc[2, :] = 2.0
+
+    for keep, expected in [('first', [1, 1, 3, 1]),
+                           ('last', [1, 2, 3, 1]),
+                           ('mean', [1, 1.5, 3, 1])]:
+        campbell_file.records = records
+        unique_records = campbell_file.remove_duplicates(keep).sort_index()
+        assert unique_records.index.is_unique
+        assert len(unique_records) == 4
+        assert unique_records.iloc[:, 0].tolist() == expected
+
+    # The first value of the non numeric columns is kept with 'mean'.
+    campbell_file.records = records.assign(flag=['a', 'b', 'c', 'd', 'e'])
+    unique_records = campbell_file.remove_duplicates('mean').sort_index()
+    assert list(unique_records.columns) == list(records.columns) + ['flag']
+    assert unique_records.iloc[:, 0].tolist() == [1, 1.5, 3, 1]
+    assert unique_records['flag'].tolist() == ['b', 'a', 'd', 'e']
+
+    # The records are left untouched when the index is already sorted and
+    # unique.
+    campbell_file.records = unique_records
+    assert campbell_file.remove_duplicates() is unique_records
+
+    with pytest.raises(ValueError):
+        campbell_file.remove_duplicates('max')
+
+
+def test_campbell_toa5_follow(test_files_dir, tmp_path):
+    """
+    Test reading the rows appended to a Campbell TOA5 .dat file, with and
+    without a restart of the reader.
+    """
+    with open(osp.join(test_files_dir, 'campbell_toa5_file.dat'), 'rb') as f:
+        lines = f.readlines()
+    filename = str(tmp_path / 'campbell_toa5_file.dat')
+    checkpoint = str(tmp_path / 'checkpoint.json')
+
+    # The last row is still being written by the datalogger.
+    with open(filename, 'wb') as f:
+        f.writelines(lines[:5])
+        f.write(lines[5][:20])
+    campbell_file = hsr.DATCampbellCRFileReader(
+        filename, checkpoint_file=checkpoint)
+    assert len(campbell_file.records) == 1
+
+    with open(filename, 'ab') as f:
+        f.write(lines[5][20:])
+        f.write(lines[6])
+    new_records = campbell_file.update_records()
+    assert new_records.index.tolist() == [
+        Timestamp('2017-02-22 13:00:00'), Timestamp('2017-02-24 09:00:00')]
+    assert len(campbell_file.records) == 3
+    assert campbell_file.sites.visit_date == Timestamp('2017-02-24 09:00:00')
+    assert len(campbell_file.update_records()) == 0
+
+    # Only the rows appended after the checkpoint are read on restart.
+    with open(filename, 'ab') as f:
+        f.write(lines[7])
+    campbell_file = hsr.DATCampbellCRFileReader(
+        filename, checkpoint_file=checkpoint)
+    assert campbell_file.records.index.tolist() == [
+        Timestamp('2017-02-24 09:30:00')]
+    assert campbell_file.sites.site_name == "F2_XM20170222"
+
+    # Without a byte offset, the rows are read again from the start of the
+    # file, but only those after the last timestamp read are new.
+    campbell_file = hsr.DATCampbellCRFileReader(filename)
+    campbell_file._data_offset = None
+    assert len(campbell_file.update_records()) == 0
+    assert len(campbell_file.records) == 4
+    assert campbell_file._data_offset == osp.getsize(filename)
+
+
+def test_campbell_toa5_follow_many_updates(test_files_dir, tmp_path):
+    """
+    Test that the records read by many updates are buffered and joined to
+    the records only once, when the records are read.
+    """
+    with open(osp.join(test_files_dir, 'campbell_toa5_file.dat'), 'rb') as f:
+        lines = f.readlines()
+    filename = str(tmp_path / 'campbell_toa5_file.dat')
+    with open(filename, 'wb') as f:
+        f.writelines(lines[:5])
+    campbell_file = hsr.DATCampbellCRFileReader(filename)
+    records = campbell_file.records
+    assert len(records) == 1
+
+    row = lines[5].split(b',', 1)[1]
+    dates = pd.date_range('2017-02-22 13:00:00', periods=50, freq='30min')
+    for date in dates:
+        with open(filename, 'ab') as f:
+            f.write(date.strftime('"%Y-%m-%d %H:%M:%S",').encode() + row)
+            if date == dates[10]:
+                # A duplicated timestamp in the appended rows.
+                f.write(date.strftime('"%Y-%m-%d %H:%M:%S",').encode() + row)
+        assert len(campbell_file.update_records()) in (1, 2)
+    # The records were not rebuilt by the updates.
+    assert campbell_file.sites.records is records
+
+    records = campbell_file.records
+    assert len(records) == 51
+    assert records.index.is_unique
+    assert records.index[1:].equals(dates)
+    assert campbell_file.records is records
+
+
+@pytest.fixture
+def tob1_file(tmp_path):
+    """
+    Write a synthetic Campbell TOB1 binary file and return its path.
+    """
+    header = ('"TOB1","PO-03","CR800","2656","CR800.Std.04",'
+              '"CPU:F2_XM20170222.CR8","21158","F2_XM20170222"\r\n'
+              '"SECONDS","NANOSECONDS","RECORD","Bat_Volt","CH4","Count"\r\n'
+              '"SECONDS","NANOSECONDS","RN","volt","%",""\r\n'
+              '"","","","Smp","Smp","Smp"\r\n'
+              '"ULONG","ULONG","ULONG","IEEE4","FP2","ULONG"\r\n')
+    records = np.zeros(3, dtype=[
+        ('seconds', '<u4'), ('nanoseconds', '<u4'), ('record', '<u4'),
+        ('bat_volt', '<f4'), ('ch4', '>u2'), ('count', '<u4')])
+    # 2017-02-22 12:30:00 is 856614600 seconds after 1990-01-01.
+    records['seconds'] = [856614600, 856616400, 856618200]
+    records['nanoseconds'] = [0, 500000000, 0]
+    records['record'] = [0, 1, 2]
+    records['bat_volt'] = [14.5, 14.25, 13.75]
+    # FP2 values of 12.34, -1.5 and NaN.
+    records['ch4'] = [(2 << 13) | 1234, 0x8000 | (1 << 13) | 15, 0x9FFE]
+    records['count'] = [7, 8, 9]
+
+    filename = str(tmp_path / 'campbell_tob1_file.dat')
+    with open(filename, 'wb') as f:
+        f.write(header.encode('ascii'))
+        f.write(records.tobytes())
+    return filename
+
+
+def test_campbell_tob1_reader(tob1_file):
+    """Test reading Campbell TOB1 binary files."""
+    campbell_file = hsr.DATCampbellTOB1FileReader(tob1_file)
+
+    sites = campbell_file.sites
+    assert sites.site_name == "F2_XM20170222"
+    assert sites.instrument_serial_number == "2656"
+    assert sites.visit_date == Timestamp('2017-02-22 13:30:00')
+
+    records = campbell_file.records
+    assert list(records.columns) == ['Bat_Volt (volt)', 'CH4 (%)', 'Count ()']
+    assert records.index.tolist() == [Timestamp('2017-02-22 12:30:00'),
+                                      Timestamp('2017-02-22 13:00:00.5'),
+                                      Timestamp('2017-02-22 13:30:00')]
+    assert records['Bat_Volt (volt)'].tolist() == [14.5, 14.25, 13.75]
+    assert records['CH4 (%)'].iloc[0] == pytest.approx(12.34)
+    assert records['CH4 (%)'].iloc[1] == -1.5
+    assert np.isnan(records['CH4 (%)'].iloc[2])
+    assert records['Count ()'].tolist() == [7, 8, 9]
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © HydroSensorReader Project Contributors
+# https://github.com/cgq-qgc/HydroSensorReader
+#
+# This file is part of HydroSensorReader.
+# Licensed under the terms of the MIT License.
+# -----------------------------------------------------------------------------
+
+# ---- Standard imports
+import os
+import os.path as osp
+
+# ---- Third party imports
+import openpyxl
+import pandas as pd
+import pytest
+from pandas import Timestamp
+
+# ---- Local imports
+from hydsensread.file_reader.compagny_file_reader.hanna_file_reader import (
+    XLSHannaFileReader)
+
+
+# ---- Fixtures
+@pytest.fixture(scope="module")
+def hanna_file_path():
+    return osp.join(osp.dirname(osp.dirname(osp.dirname(osp.dirname(__file__)))),
+                    'file_example', 'LOG006_0621113447.xls')
+
+
+# ---- Tests
+def test_hanna_reader(hanna_file_path):
+    """Test reading Hanna xls files."""
+    hanna_file = XLSHannaFileReader(hanna_file_path)
+
+    records = hanna_file.records
+    assert len(records) == 1223
+    assert records.index.dtype == 'datetime64[ns]'
+    assert records.index[0] == Timestamp('2017-06-21 11:34:47')
+    assert records.index[-1] == Timestamp('2017-06-21 11:55:09')
+    assert records.iloc[0, 0] == 13.41
+
+
+def test_hanna_reader_xlsx(hanna_file_path, tmp_path):
+    """
+    Test reading Hanna xlsx files, whose time cells are read as
+    datetime.time by openpyxl.
+    """
+    hanna_file = XLSHannaFileReader(hanna_file_path)
+
+    workbook = openpyxl.Workbook()
+    workbook.remove(workbook.active)
+    header_sheet = workbook.create_sheet(XLSHannaFileReader.HEADER_SHEET)
+    for row in hanna_file.header_info:
+        header_sheet.append(row)
+    data_sheet = workbook.create_sheet(XLSHannaFileReader.DATA_SHEET)
+    data_sheet.append(hanna_file.data_sheet[0])
+    for row in hanna_file.data_sheet[1:]:
+        data_sheet.append([row[0], row[1].time()] + row[2:])
+    xlsx_file_path = str(tmp_path / 'hanna_file.xlsx')
+    workbook.save(xlsx_file_path)
+
+    xlsx_hanna_file = XLSHannaFileReader(xlsx_file_path)
+    assert xlsx_hanna_file.records.index.dtype == 'datetime64[ns]'
+    pd.testing.assert_index_equal(
+        xlsx_hanna_file.records.index, hanna_file.records.index)
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © HydroSensorReader Project Contributors
+# https://github.com/cgq-qgc/HydroSensorReader
+#
+# This file is part of HydroSensorReader.
+# Licensed under the terms of the MIT License.
+# -----------------------------------------------------------------------------
+
+# ---- Standard imports
+import os
+import os.path as osp
+
+# ---- Third party imports
+import numpy as np
+import pytest
+from pandas import Timestamp
+
+# ---- Local imports
+from hydsensread.file_reader.compagny_file_reader.hydrolab_file_reader import (
+    TXTHydrolabFileReader)
+
+
+# ---- Fixtures
+@pytest.fixture(scope="module")
+def test_files_dir():
+    return osp.join(osp.dirname(__file__), 'files')
+
+
+# ---- Tests
+def test_hydrolab_reader(test_files_dir):
+    """Test reading Hydrolab files."""
+    hydrolab_file = TXTHydrolabFileReader(
+        osp.join(test_files_dir, 'hydrolab_file.txt'))
+
+    sites = hydrolab_file.sites
+    assert sites.site_name == "site_name_for_hydrolab_file"
+    assert sites.instrument_serial_number == "65376"
+    assert sites.visit_date == Timestamp('2017-02-22 11:48:20')
+
+    records = hydrolab_file.records
+    assert len(records) == 4
+    assert list(records.columns) == [
+        'Temp (°C)', 'TDG (mmHg)', 'TDG (psia)', 'TDG (mV)', 'IBatt (Volts)',
+        'EBatt (Volts)', 'IBatt (%Left)', 'EBatt (%Left)', 'Circ (Status)']
+
+    assert records.index[0] == Timestamp('2017-02-22 12:00:00')
+    assert records.iloc[0].tolist() == [
+        8.24, 751, 14.53, 12.12, 11.4, 0, 87, 0, 1]
+
+    # The '#' flag in the separator column and the 'NAN' values must not
+    # shift the values of the other columns.
+    assert records.index[-1] == Timestamp('2017-03-10 13:30:02')
+    assert records.iloc[-1, 0] == 55
+    assert np.isnan(records.iloc[-1, 1:4]).all()
+    assert records.iloc[-1, 4:].tolist() == [0, 0, 0, 0, 0]
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
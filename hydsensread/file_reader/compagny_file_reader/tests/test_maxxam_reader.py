@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © HydroSensorReader Project Contributors
+# https://github.com/cgq-qgc/HydroSensorReader
+#
+# This file is part of HydroSensorReader.
+# Licensed under the terms of the MIT License.
+# -----------------------------------------------------------------------------
+
+# ---- Standard imports
+import datetime
+import os
+import os.path as osp
+
+# ---- Third party imports
+import pytest
+
+# ---- Local imports
+from hydsensread.file_reader.compagny_file_reader.maxxam_file_reader import (
+    AnalysisTypeRegistry, XSLMaxxamFileReader)
+
+
+# ---- Fixtures
+@pytest.fixture(scope="module")
+def maxxam_file_path():
+    return osp.join(osp.dirname(osp.dirname(osp.dirname(osp.dirname(__file__)))),
+                    'file_example', 'B653824V1-R2016-08-18_16-31-39_N001.xls')
+
+
+# ---- Tests
+def test_maxxam_reader(maxxam_file_path, tmp_path):
+    """Test reading Maxxam files."""
+    registry_file = str(tmp_path / 'maxxam_analysis_type.txt')
+    with open(registry_file, 'w', encoding='utf-8') as f:
+        f.write("OTHER ANALYSIS\n")
+    registry = AnalysisTypeRegistry(registry_file)
+
+    maxxam_file = XSLMaxxamFileReader(maxxam_file_path,
+                                      analysis_type_registry=registry)
+    maxxam_file.read_file()
+    assert maxxam_file.analysis_methode == ['MÉTAUX ICP-MS', 'CONVENTIONNELS']
+
+    sites = maxxam_file.sites
+    assert 'PO-920-REDI-AUGUST2016  Dup. de Lab.' in sites
+    sample = sites['PO-920-REDI-AUGUST2016']['MÉTAUX ICP-MS']
+    assert sample.visit_date == datetime.datetime(2016, 8, 9, 10)
+    assert len(sample.records) == 30
+    record = sample.records[0]
+    assert record.parameter == 'Aluminium (Al)'
+    assert record.parameter_unit == 'ug/L'
+    assert record.value == '<10'
+    assert record.report_date == datetime.datetime(2016, 8, 18)
+    assert record.analysis_type == 'MÉTAUX ICP-MS'
+
+    # The analysis types are added to the registry file in a single write.
+    with open(registry_file, encoding='utf-8') as f:
+        assert f.read().splitlines() == [
+            'OTHER ANALYSIS', 'MÉTAUX ICP-MS', 'CONVENTIONNELS']
+    assert list(AnalysisTypeRegistry(registry_file)) == list(registry)
+
+
+def test_maxxam_reader_default_registry(maxxam_file_path):
+    """Test that the readers that are not given a registry don't share one."""
+    first_file = XSLMaxxamFileReader(maxxam_file_path)
+    first_file.read_file()
+    assert list(first_file.analysis_type_registry) == [
+        'MÉTAUX ICP-MS', 'CONVENTIONNELS']
+
+    second_file = XSLMaxxamFileReader(maxxam_file_path)
+    assert second_file.analysis_type_registry is not first_file.analysis_type_registry
+    assert len(second_file.analysis_type_registry) == 0
+
+
+def test_maxxam_reader_read_twice(maxxam_file_path):
+    """Test that reading a file again doesn't add its records twice."""
+    maxxam_file = XSLMaxxamFileReader(maxxam_file_path)
+    maxxam_file.read_file()
+    nrecords = len(maxxam_file.records)
+
+    maxxam_file.read_file()
+    assert len(maxxam_file.records) == nrecords
+    sample = maxxam_file.sites['PO-920-REDI-AUGUST2016']['MÉTAUX ICP-MS']
+    assert len(sample.records) == 30
+
+
+def test_analysis_type_registry_without_file():
+    """Test that a registry without a file is kept in memory only."""
+    registry = AnalysisTypeRegistry()
+    registry.add('CONVENTIONNELS')
+    registry.add('CONVENTIONNELS')
+    registry.save()
+    assert len(registry) == 1
+    assert 'CONVENTIONNELS' in registry
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
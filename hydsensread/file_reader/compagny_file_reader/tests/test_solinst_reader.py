@@ -10,10 +10,11 @@
 # ---- Standard imports
 import os
 import os.path as osp
+import pickle
 
 # ---- Third party imports
 import pytest
-from pandas import Timestamp
+from pandas import Timedelta, Timestamp
 import pandas as pd
 
 # ---- Local imports
@@ -98,6 +99,10 @@ def test_solinst_levelogger_gold(test_files_dir, testfile):
     assert sites.site_name == "Saint-Guillaume_P14A"
     assert sites.other_attributes['altitude'] == 42
 
+    # The dates sampled every 15 minutes are kept as a compact index.
+    assert sites.time_index.step == Timedelta('15min')
+    assert sites.end_date == Timestamp('2017-05-04 14:45:00')
+
     records = solinst_file.records
     assert len(records) == 200
     assert list(records.columns) == ["LEVEL_cm", "TEMPERATURE_degC"]
@@ -224,5 +229,58 @@ def test_filename_with_dot_in_path(test_files_dir):
     assert len(records) == 10
 
 
+@pytest.mark.parametrize(
+    'testfile',
+    ["2XXXXXX_solinst_levelogger_edge.csv",
+     "2XXXXXX_solinst_levelogger_edge.lev",
+     "2XXXXXX_solinst_levelogger_edge.xle"])
+def test_release_raw_content(test_files_dir, testfile):
+    """
+    Test that the raw content of the file is released after reading when
+    keep_raw is False, and that the reader can be pickled.
+    """
+    filename = osp.join(test_files_dir, testfile)
+    solinst_file = hsr.SolinstFileReader(filename, keep_raw=False)
+    assert solinst_file.file_reader is None
+    with pytest.raises(ValueError):
+        solinst_file.file_content
+
+    expected = hsr.SolinstFileReader(filename)
+    unpickled = pickle.loads(pickle.dumps(solinst_file))
+    assert unpickled.sites.site_name == expected.sites.site_name
+    pd.testing.assert_frame_equal(unpickled.records, expected.records)
+
+
+def test_xle_logs_outside_data_block(test_files_dir, tmp_path):
+    """
+    Test that the logs of a XLE file are read whether or not they are
+    grouped in a 'Data' block, and that the header of the file is available
+    only once the file is read.
+    """
+    filename = osp.join(
+        test_files_dir, "2XXXXXX_solinst_levelogger_edge.xle")
+    with open(filename, encoding='iso-8859-1') as xle_file:
+        content = xle_file.read()
+    content = content.replace('<Data>', '').replace('</Data>', '')
+    modified_filename = str(tmp_path / 'solinst_without_data_block.xle')
+    with open(modified_filename, 'w', encoding='iso-8859-1') as xle_file:
+        xle_file.write(content)
+
+    solinst_file = hsr.SolinstFileReader(modified_filename, wait_read=True)
+    with pytest.raises(ValueError):
+        solinst_file._get_site_name()
+
+    solinst_file.read_file()
+    expected = hsr.SolinstFileReader(filename)
+    assert solinst_file.sites.site_name == expected.sites.site_name
+    pd.testing.assert_frame_equal(solinst_file.records, expected.records)
+
+    # The header blocks are kept in the file content once streamed, while
+    # the logs are released.
+    file_root = solinst_file.file_content.getroot()
+    assert file_root.find('File_info').find('Date').text == '2017/11/22'
+    assert len(list(file_root.iter('Log'))) == 0
+
+
 if __name__ == "__main__":
     pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
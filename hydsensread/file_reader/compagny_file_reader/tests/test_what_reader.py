@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright © HydroSensorReader Project Contributors
+# https://github.com/cgq-qgc/HydroSensorReader
+#
+# This file is part of HydroSensorReader.
+# Licensed under the terms of the MIT License.
+# -----------------------------------------------------------------------------
+
+# ---- Standard imports
+import os
+import os.path as osp
+
+# ---- Third party imports
+import numpy as np
+import pytest
+from pandas import Timestamp
+
+# ---- Local imports
+from hydsensread.file_reader.compagny_file_reader import (
+    WhatMeteorologicalOutFileReader)
+
+
+# ---- Fixtures
+@pytest.fixture(scope="module")
+def test_files_dir():
+    return osp.join(osp.dirname(__file__), 'files')
+
+
+# ---- Tests
+def test_what_meteo_out_reader(test_files_dir):
+    """Test reading the tab-delimited weather files produced by WHAT."""
+    what_file = WhatMeteorologicalOutFileReader(
+        osp.join(test_files_dir, 'what_meteo_file.out'))
+
+    sites = what_file.sites
+    assert sites.site_name == "7020560"
+    assert sites.other_identifier == "BEAUCEVILLE"
+    assert tuple(sites.coordinates_x_y_z) == (-70.77, 46.2, 160.0)
+
+    records = what_file.records
+    assert len(records) == 5
+    assert list(records.columns) == [
+        'Max Temp_deg C', 'Min Temp_deg C', 'Mean Temp_deg C',
+        'Total Precip_mm']
+    assert (records.dtypes == np.float32).all()
+
+    assert records.index[0] == Timestamp('1980-01-01')
+    assert records.index[-1] == Timestamp('1980-01-05')
+    assert records.iloc[0].tolist() == pytest.approx(
+        [-3.9, -13.9, -8.9, 0.0], abs=1e-6)
+
+
+if __name__ == "__main__":
+    pytest.main(['-x', os.path.basename(__file__), '-v', '-rw'])
@@ -7,11 +7,15 @@ __date__ = '2017-07-16$'
 __description__ = "Permet de lire des fichiers provenant de l'interface" \
                   " WHAT : https://github.com/jnsebgosselin/what.git"
 __version__ = '1.0'
-import datetime
 from abc import abstractmethod
 from typing import Union, List, Tuple
 
+import numpy as np
+import pandas as pd
+
 # ---- Local imports
+from hydsensread import file_parser
+from hydsensread.file_parser import parse_date_components
 from hydsensread.site_and_records import (
     geographical_coordinates, StationSite, StreamFlowStation)
 from hydsensread.file_reader.abstract_file_reader import (
@@ -25,15 +29,46 @@ station_possible = Union[StationSite, StreamFlowStation]
 
 
 class AbstractWhatFileReader(TimeSeriesFileReader):
+    # Type of the values of the data block.
+    DATA_DTYPE = float
+
     def __init__(self, file_path: str = None, header_length: int = WHAT_METEO_FILES_HEADER_LENGTH,
-                 station_type: station_possible = None):
-        # if file_name is None:
-        #     pass
-        # else:
-        super().__init__(file_path, header_length)
+                 station_type: station_possible = None, keep_raw: bool = True):
+        self._data_block = None
+        # The file is read only once the station is set.
+        super().__init__(file_path, header_length, wait_read=True,
+                         keep_raw=keep_raw)
         self._site_of_interest = station_type
+        self.file_reader.read_file()
         self.read_file()
 
+    def _set_file_reader(self) -> file_parser.CSVFileParser:
+        """
+        Extension of the base class method.
+
+        Only the header and the data header of the file are read with the
+        csv parser. The data block is parsed in bulk with pandas in
+        _read_data_block.
+        """
+        return file_parser.CSVFileParser(
+            file_path=self._file,
+            header_length=self._header_length,
+            header_only=True,
+            delimiter='\t' if self.file_extension in self.TSV_FILES_TYPES else ',')
+
+    def _read_data_block(self) -> pd.DataFrame:
+        """Parse the data block of the file in a single pass."""
+        if self._data_block is None:
+            self._data_block = pd.read_csv(
+                self._file,
+                sep=self.file_reader.delimiter,
+                header=None,
+                skiprows=self._header_length + 1,
+                dtype=self.DATA_DTYPE,
+                encoding=self.file_reader.encoding_style,
+                engine='c')
+        return self._data_block
+
     def _read_file_header(self):
         for i, data in zip(range(self._header_length), self.file_content):
             if len(data) > 0:
@@ -47,8 +82,9 @@ class AbstractWhatFileReader(TimeSeriesFileReader):
             - c'est à dire, sans les colonnes de date.
         :return:
         """
-        for index, elt in zip(range(len(self.file_content[self._header_length][start_data_column:])),
-                              self.file_content[self._header_length][start_data_column:]):
+        data_block = self._read_data_block()
+        time_series = []
+        for index, elt in enumerate(self.file_content[self._header_length][start_data_column:]):
             parameter = elt.split(' (')[0]
             try:
                 unit = elt.split(' (')[1].split(')')[0]
@@ -56,10 +92,11 @@ class AbstractWhatFileReader(TimeSeriesFileReader):
                 print(str(i))
                 print(elt)
             else:
-                datas = []
-                for row in self.file_content[self._header_length + 1:]:
-                    datas.append(float(row[index + start_data_column]))
-                self._site_of_interest.create_time_serie(parameter, unit, self._get_date_list(), datas)
+                datas = data_block[index + start_data_column].values
+                time_series.append((parameter, unit, datas))
+        if time_series:
+            self._site_of_interest.set_time_series(self._get_date_list(), time_series)
+        self._data_block = None
 
     @property
     def sites(self) -> Union[StreamFlowStation, StationSite]:
@@ -92,11 +129,11 @@ class AbstractWhatFileReader(TimeSeriesFileReader):
                         month_column_index: int = 1,
                         day_column_index: int = 2):
         if len(self._date_list) == 0:
-            for row in self.file_content[self._header_length + 1:]:
-                year = int(row[year_column_index].split(".")[0])
-                month = int(row[month_column_index].split(".")[0])
-                day = int(row[day_column_index].split(".")[0])
-                self._date_list.append(datetime.datetime(year, month, day))
+            data_block = self._read_data_block()
+            self._date_list = parse_date_components(
+                data_block[year_column_index].values,
+                data_block[month_column_index].values,
+                data_block[day_column_index].values)
         return self._date_list
 
     def _set_station_attribute(self, attribute, what_to_search):
@@ -116,8 +153,11 @@ class AbstractWhatFileReader(TimeSeriesFileReader):
 
 
 class WhatMeteorologicalDataFileReader(AbstractWhatFileReader):
-    def __init__(self, file_path: str = None):
-        super().__init__(file_path, WHAT_METEO_FILES_HEADER_LENGTH, StationSite())
+    def __init__(self, file_path: str = None,
+                 header_length: int = WHAT_METEO_FILES_HEADER_LENGTH,
+                 keep_raw: bool = True):
+        super().__init__(file_path, header_length, StationSite(),
+                         keep_raw=keep_raw)
 
     def _read_file_data_header(self):
         self._make_station_coordinates_from_file()
@@ -131,9 +171,18 @@ class WhatMeteorologicalDataFileReader(AbstractWhatFileReader):
         super()._read_file_data(start_data_column)
 
 
+class WhatMeteorologicalOutFileReader(WhatMeteorologicalDataFileReader):
+    """
+    Reader of the tab-delimited '.out' daily weather files produced by WHAT.
+    The values of the time series are kept as float32.
+    """
+    DATA_DTYPE = np.float32
+
+
 class WhatWaterLevelDataFileReader(AbstractWhatFileReader):
-    def __init__(self, file_path: str = None):
-        super().__init__(file_path, WHAT_WATER_LEVEL_FILES_HEADER_LENGTH, station_type=StationSite())
+    def __init__(self, file_path: str = None, keep_raw: bool = True):
+        super().__init__(file_path, WHAT_WATER_LEVEL_FILES_HEADER_LENGTH, station_type=StationSite(),
+                         keep_raw=keep_raw)
 
     def _read_file_data(self, start_data_column: int = 4):
         super()._read_file_data(start_data_column)
@@ -155,8 +204,10 @@ class WhatWaterLevelDataFileReader(AbstractWhatFileReader):
 
 class WhatStreamAndLevelDataFileReader(AbstractWhatFileReader):
     def __init__(self, file_path: str = None,
-                 header_length: int = WHAT_STREAM_FLOW_STATION_HEADER_LENGTH):
-        super().__init__(file_path, header_length, StreamFlowStation())
+                 header_length: int = WHAT_STREAM_FLOW_STATION_HEADER_LENGTH,
+                 keep_raw: bool = True):
+        super().__init__(file_path, header_length, StreamFlowStation(),
+                         keep_raw=keep_raw)
 
     def _read_file_data(self, start_data_column: int = 4):
         super()._read_file_data(start_data_column)
@@ -5,5 +5,6 @@ __date__ = '2017-07-12'
 __description__ = " "
 __version__ = '1.0'
 
-from .records import ChemistryRecord, Parameter, Record, TimeSeriesRecords
-from .site import Sample, SensorPlateform, Site, StreamFlowStation, StationSite, DrillingSite, geographical_coordinates
+from .records import (ChemistryRecord, Parameter, Record, RegularTimeIndex, SampleTable, SampleTableRecord,
+                      TimeSeriesRecords, normalize_chemistry_values)
+from .site import Sample, SampleTableRecords, SensorPlateform, Site, StreamFlowStation, StationSite, DrillingSite, geographical_coordinates
@@ -9,29 +9,138 @@ import datetime
 import re
 import typing
 import warnings
-from collections import OrderedDict
+import weakref
+from array import array
+from collections import OrderedDict, defaultdict
 
 import numpy as np
 import pandas as pd
 
+# Pattern of the not detected chemistry results, searched in the lower case
+# results: trace, tr., nd, n.d., not detected, nan...
+NOT_DETECTED_PATTERN = re.compile(r"^tr.*|n(?:.{0,1}|ot.*)d.*|nan")
+# Censoring of the chemistry results
+NOT_CENSORED = 0
+NOT_DETECTED = 1
+BELOW_DETECTION_LIMIT = 2
+
+
+def _parse_chemistry_value(value, errors: str = 'raise') -> typing.Tuple[float, int]:
+    """
+    Apply to a raw chemistry result the business rules that don't need the
+    detection limit and return the normalized value with its censoring.
+    The normalized value of the not detected results is NaN.
+    """
+    string = str(value)
+    if NOT_DETECTED_PATTERN.search(string.lower()):
+        return float('nan'), NOT_DETECTED
+    censoring = NOT_CENSORED
+    try:
+        # transform values like <0.5 to 0.25 by divinding the result by two
+        if '<' in string:
+            censoring = BELOW_DETECTION_LIMIT
+            return float(string.replace('<', '').replace(' ', '')) / 2.0, censoring
+        # the result is just a result
+        return float(string), censoring
+    except ValueError:
+        if errors != 'coerce':
+            raise
+        return float('nan'), censoring
+
+
+def normalize_chemistry_values(values, detection_limits=None,
+                               errors: str = 'raise') -> pd.DataFrame:
+    """
+    Normalize whole columns of raw chemistry results by the business rules
+    of ChemistryRecord.normalized_value:
+    - not detected and trace results are set to half the detection limit,
+      or NaN if there is no detection limit
+    - results like <0.5 are set to half of their value
+    - the other results are converted to float
+    A lab report holds few distinct results, so the rules are applied once
+    per distinct result and the detection limits are applied in bulk.
+    Like in ChemistryRecord.normalized_value, a NaN result is not detected.
+    A None result is a missing result: its value is NaN and it isn't censored.
+    :param values: raw results, as strings or numbers
+    :param detection_limits: detection limits of the results
+    :param errors: if 'coerce', the results that can't be converted to float
+    are set to NaN instead of raising a ValueError
+    :return: a DataFrame with the normalized float values in the
+    'normalized_value' column and a 'censored' flag column that is True for
+    the not detected, trace and below detection limit results
+    """
+    values = np.array(values, dtype=object)
+    # pandas.factorize treats NaN like None, so the NaN results are parsed
+    # like their 'nan' string.
+    is_nan = pd.isnull(values)
+    is_nan &= values != None  # noqa: E711, elementwise comparison
+    values[is_nan] = 'nan'
+    # The None results get the code -1, which points to the NaN added at
+    # the end of the parsed distinct results.
+    codes, uniques = pd.factorize(values)
+    parsed = [_parse_chemistry_value(value, errors) for value in uniques]
+    parsed.append((float('nan'), NOT_CENSORED))
+    normalized = np.array([value for value, _ in parsed], dtype=float)[codes]
+    censoring = np.array([censoring for _, censoring in parsed], dtype=np.int8)[codes]
+
+    not_detected = censoring == NOT_DETECTED
+    if detection_limits is not None and not_detected.any():
+        detection_limits = np.asarray(detection_limits, dtype=object)
+        normalized[not_detected] = pd.to_numeric(
+            detection_limits[not_detected], errors=errors) / 2.0
+    # todo : what to do with values above higher detection limit
+    return pd.DataFrame({'normalized_value': normalized,
+                         'censored': censoring != NOT_CENSORED})
+
 
 class Parameter(object):
     """
-    basic implementation of a parameter
+    basic implementation of a parameter.
+
+    Parameters are immutable and interned: creating a parameter equal to an existing one
+    returns the existing object, so that all the records of a (parameter, unit) pair share it.
     """
+    __slots__ = ('_parameter', '_unit', '_string', '__weakref__')
+    _cache = weakref.WeakValueDictionary()
 
-    def __init__(self, param_name, unit):
-        self.parameter = param_name
-        self.unit = unit
+    def __new__(cls, param_name, unit):
+        # the types are part of the key, so that 1 and 1.0 aren't the same parameter
+        key = (cls, type(param_name), param_name, type(unit), unit)
+        try:
+            return cls._cache[key]
+        except KeyError:
+            pass
+        except TypeError:
+            # unhashable parameter name or unit
+            key = None
+        self = super().__new__(cls)
+        self._parameter = param_name
+        self._unit = unit
+        self._string = '{}_{}'.format(param_name, unit)
+        if key is not None:
+            cls._cache[key] = self
+        return self
+
+    @property
+    def parameter(self):
+        return self._parameter
+
+    @property
+    def unit(self):
+        return self._unit
+
+    def __reduce__(self):
+        return self.__class__, (self._parameter, self._unit)
 
     def __str__(self) -> str:
-        return '{}_{}'.format(self.parameter, self.unit)
+        return self._string
 
 
 class Record(object):
     """
     implementation of a basic record given by any kind of data file
     """
+    __slots__ = ('record_date', '_parameter', 'value')
 
     def __init__(self, record_date: datetime.datetime = None,
                  parameter: str = None,
@@ -47,7 +156,7 @@ class Record(object):
 
     @parameter.setter
     def parameter(self, value: str):
-        self._parameter.parameter = value
+        self._parameter = Parameter(value, self._parameter.unit)
 
     @property
     def parameter_unit(self):
@@ -55,18 +164,101 @@ class Record(object):
 
     @parameter_unit.setter
     def parameter_unit(self, value: str):
-        self._parameter.unit = value
+        self._parameter = Parameter(self._parameter.parameter, value)
 
     @property
     def parameter_as_string(self):
         return self._parameter.__str__()
 
 
+class RegularTimeIndex(object):
+    """
+    Compact index of dates sampled at a regular interval, like the dates of the loggers. Only the
+    start date, the step and the length of the index are stored, and the dates are expanded to a
+    pandas.DatetimeIndex only when needed. The position of a date is found in O(1).
+    """
+    __slots__ = ('start', 'step', 'length')
+
+    def __init__(self, start: typing.Union[datetime.datetime, pd.Timestamp],
+                 step: typing.Union[datetime.timedelta, pd.Timedelta],
+                 length: int):
+        self.start = pd.Timestamp(start)
+        self.step = pd.Timedelta(step)
+        self.length = length
+
+    @classmethod
+    def from_dates(cls, dates) -> typing.Optional['RegularTimeIndex']:
+        """
+        Return the compact index of the dates, or None if the dates are not sampled at a regular
+        and increasing interval.
+        """
+        dates = pd.Index(dates)
+        if (not isinstance(dates, pd.DatetimeIndex) or len(dates) < 2 or
+                dates.tz is not None or dates.hasnans):
+            return None
+        nanoseconds = dates.values.astype('datetime64[ns]').view('int64')
+        steps = np.diff(nanoseconds)
+        if steps[0] <= 0 or (steps != steps[0]).any():
+            return None
+        return cls(dates[0], pd.Timedelta(int(steps[0]), 'ns'), len(dates))
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, item: slice) -> 'RegularTimeIndex':
+        start, stop, step = item.indices(self.length)
+        if step != 1:
+            raise ValueError("only contiguous slices of a RegularTimeIndex are supported")
+        return RegularTimeIndex(self.start + self.step * start, self.step, max(stop - start, 0))
+
+    @property
+    def end(self) -> pd.Timestamp:
+        if self.length == 0:
+            return pd.NaT
+        return self.start + self.step * (self.length - 1)
+
+    def to_index(self) -> pd.DatetimeIndex:
+        return pd.date_range(self.start, periods=self.length, freq=self.step)
+
+    def get_loc(self, date) -> int:
+        """
+        Return the position of the date in the index
+        :raise: KeyError if date not present
+        """
+        position, remainder = divmod((pd.Timestamp(date) - self.start).value, self.step.value)
+        if remainder != 0 or not 0 <= position < self.length:
+            raise KeyError(date)
+        return position
+
+    def slice_between(self, first_date=None, last_date=None) -> slice:
+        """
+        Return the slice of the positions of the dates >= first_date and <= last_date
+        """
+        first, last = 0, self.length
+        if first_date is not None:
+            # ceil division
+            first = -((self.start - pd.Timestamp(first_date)).value // self.step.value)
+        if last_date is not None:
+            last = (pd.Timestamp(last_date) - self.start).value // self.step.value + 1
+        first = min(max(first, 0), self.length)
+        last = min(max(last, first), self.length)
+        return slice(first, last)
+
+
 class TimeSeriesRecords(Record):
     """
     implementation of a TimeSeriesRecord. The record_date correspond to the first date of the values list.
     Values are stored as a pandas.Series
+
+    The values added with set_time_serie_values are kept in an append buffer and are concatenated
+    to the Series only once, when the values are read.
+
+    When the dates are sampled at a regular interval, they are kept as a RegularTimeIndex and
+    the Series is built only when the values are read. Until then, get_data_between, start_date
+    and end_date use the RegularTimeIndex to find the dates in O(1). Once built, the Series can be
+    modified by the caller, so the RegularTimeIndex is dropped.
     """
+    __slots__ = ('_value', '_pending_values', '_sorted_dates', '_time_index', '_compact_values')
 
     def __init__(self,
                  records_date: typing.Union[list, typing.List[datetime.datetime], pd.DatetimeIndex] = None,
@@ -84,11 +276,68 @@ class TimeSeriesRecords(Record):
 
             super().__init__(records_date[0],
                              parameter, parameter_unit, values[0])
-            self.value = pd.Series(data=values, index=records_date, name=self.parameter_as_string)
+            time_index = RegularTimeIndex.from_dates(records_date)
+            if time_index is None or len(time_index) != len(values):
+                self.value = pd.Series(data=values, index=records_date, name=self.parameter_as_string)
+            else:
+                self.value = None
+                self._time_index = time_index
+                # the values are converted like by the pandas.Series of the irregular dates
+                self._compact_values = pd.Series(values).array
         else:
             super().__init__(records_date, parameter, parameter_unit, values)
             self.value = pd.Series()
 
+    @property
+    def value(self) -> pd.Series:
+        value = self._flushed_value()
+        # the Series handed out can be modified, so the sorted dates are rebuilt on the next append
+        self._sorted_dates = None
+        return value
+
+    @value.setter
+    def value(self, value: pd.Series):
+        self._value = value
+        self._pending_values = []
+        # sorted runs of the dates of the values, built on the first append
+        self._sorted_dates = None
+        self._time_index = None
+        self._compact_values = None
+
+    def _flushed_value(self) -> pd.Series:
+        """
+        Concatenate the append buffer to the Series of the values and return it. Unlike value,
+        the sorted dates are kept, so the Series must not be handed out to the caller as is.
+        """
+        self._expand_values()
+        if self._pending_values:
+            values = [serie for serie in [self._value] + self._pending_values if len(serie) > 0]
+            self._value = pd.concat(values) if len(values) > 1 else values[0]
+            self._pending_values = []
+        return self._value
+
+    def _expand_values(self):
+        """Build the Series of the values kept with a RegularTimeIndex."""
+        if self._compact_values is not None:
+            self._value = pd.Series(data=self._compact_values, index=self._time_index.to_index(),
+                                    name=self.parameter_as_string)
+            self._compact_values = None
+            self._time_index = None
+
+    def _get_values_between(self, first_date, last_date) -> pd.Series:
+        """
+        Return the values of the dates >= first_date and <= last_date, found in O(1) with the
+        RegularTimeIndex. Only the selected values are expanded to a Series.
+        """
+        positions = self._time_index.slice_between(first_date, last_date)
+        return pd.Series(data=self._compact_values[positions],
+                         index=self._time_index[positions].to_index(),
+                         name=self.parameter_as_string)
+
+    def _has_regular_index(self) -> bool:
+        # the values are still compact: they were not handed out and nothing was appended
+        return self._compact_values is not None
+
     def add_value(self, _date: datetime.datetime, val):
         """
         Add a value to the self.value attribute. Duplicate values generate an error
@@ -96,11 +345,7 @@ class TimeSeriesRecords(Record):
         :param val: value to add
         """
         warnings.warn('deprecated method', DeprecationWarning)
-        new_serie = pd.Series([val], index=_date)
-        try:
-            self.value.append(new_serie, verify_integrity=True)
-        except ValueError as e:
-            warnings.warn(str(e), ValueError)
+        self.set_time_serie_values([_date], [val])
 
     def reorder_values(self):
         warnings.warn('deprecated function not usefull for pd.Series objects', DeprecationWarning)
@@ -109,22 +354,64 @@ class TimeSeriesRecords(Record):
             new_dict[keys] = self.value[keys]
         self.value = new_dict
 
+    @staticmethod
+    def _dates_as_array(dates) -> np.ndarray:
+        dates = np.asarray(pd.Index(dates).values)
+        if dates.dtype.kind == 'M':
+            dates = dates.astype('datetime64[ns]')
+        return dates
+
+    def _has_duplicated_dates(self, new_dates: np.ndarray) -> bool:
+        """
+        Check the new dates against the sorted runs of the dates of the values and add them to
+        the runs if there is no duplicate. The runs are disjoint and in increasing order, so the
+        dates added after all the others, which is the usual case, are checked in O(len(new_dates)).
+        """
+        if self._sorted_dates is None:
+            self._sorted_dates = []
+            dates = self.get_dates
+            if len(dates) > 0:
+                self._sorted_dates.append(np.sort(self._dates_as_array(dates)))
+        new_dates = np.sort(new_dates)
+        if len(new_dates) == 0:
+            return False
+        if (new_dates[1:] == new_dates[:-1]).any():
+            return True
+        if not self._sorted_dates or new_dates[0] > self._sorted_dates[-1][-1]:
+            self._sorted_dates.append(new_dates)
+            return False
+        if len(self._sorted_dates) > 1:
+            self._sorted_dates = [np.concatenate(self._sorted_dates)]
+        known_dates = self._sorted_dates[0]
+        positions = np.searchsorted(known_dates, new_dates).clip(max=len(known_dates) - 1)
+        if (known_dates[positions] == new_dates).any():
+            return True
+        # merging two sorted runs with a stable sort is close to linear
+        merged_dates = np.concatenate([known_dates, new_dates])
+        merged_dates.sort(kind='stable')
+        self._sorted_dates = [merged_dates]
+        return False
+
     def set_time_serie_values(self, times: typing.Union[typing.List[datetime.datetime], pd.DatetimeIndex],
                               values: typing.Union[np.ndarray, list]):
         """
-        Add multiple values to the time series
+        Add multiple values to the time series. The values are kept in an append buffer until
+        the time series is read.
         :param times: list of datetime object
         :param values: list of values
         :raise : AssertionError if Times and Values are not the same size
+        :warn: UserWarning if some times are already in the time series. The values aren't added.
         """
         assert len(times) == len(values), "Times and values are not the same size"
+        # the empty chunks aren't buffered, so that the buffer only holds values
+        if len(times) == 0:
+            return
 
-        try:
-
-            new_ts = pd.Series(values, index=times)
-            self.value = self.value.append(new_ts, verify_integrity=True, ignore_index=False)
-        except ValueError as e:
-            warnings.warn(str(e), ValueError)
+        if self._has_duplicated_dates(self._dates_as_array(times)):
+            warnings.warn("Indexes have overlapping values", UserWarning)
+            return
+        self._expand_values()
+        self._pending_values.append(pd.Series(values, index=times))
 
     def get_data_at_time(self, at_date: typing.Union[datetime.datetime, str, datetime.date]) -> pd.Series:
         """
@@ -133,12 +420,22 @@ class TimeSeriesRecords(Record):
         :param at_date: datetime object corresponding to the needed Record
         :raise: KeyError if date not present
         """
-        return self.value[at_date]
+        if isinstance(at_date, datetime.date) and not isinstance(at_date, datetime.datetime):
+            # all the records of the day
+            at_date = at_date.isoformat()
+        if self._has_regular_index() and self._is_timestamp(at_date):
+            return self._compact_values[self._time_index.get_loc(at_date)]
+        return self._flushed_value()[at_date]
+
+    @staticmethod
+    def _is_timestamp(date) -> bool:
+        # the strings are left to pandas, since they can select a whole day or month
+        return isinstance(date, (datetime.datetime, np.datetime64))
 
     def get_value_at_date(self, p_date):
         warnings.warn('deprecated element', DeprecationWarning)
         try:
-            return self.value[p_date]
+            return self._flushed_value()[p_date]
         except KeyError:
             return None
 
@@ -162,10 +459,12 @@ class TimeSeriesRecords(Record):
         # convert to pandas.Timestamp object for comparision of possible string and datetime input
         f_date = pd.Timestamp(first_date)
         l_date = pd.Timestamp(last_date)
+        if self._has_regular_index():
+            return self._get_values_between(min(f_date, l_date), max(f_date, l_date))
         if f_date > l_date:
-            return self.value[l_date:f_date]
+            return self._flushed_value()[l_date:f_date]
         else:
-            return self.value[f_date:l_date]
+            return self._flushed_value()[f_date:l_date]
 
     def get_data_before_date(self, date_before: typing.Union[datetime.datetime, str]) -> pd.Series:
         """
@@ -173,7 +472,9 @@ class TimeSeriesRecords(Record):
         :param date_before: input date
         :return: If date_before is inferior of self.start_date, return an empty Series
         """
-        return self.value[:date_before]
+        if self._has_regular_index() and self._is_timestamp(date_before):
+            return self._get_values_between(None, date_before)
+        return self._flushed_value()[:date_before]
 
     def get_data_after_date(self, date_after: typing.Union[datetime.datetime, str]) -> pd.Series:
         """
@@ -181,25 +482,34 @@ class TimeSeriesRecords(Record):
         :param date_after: input date
         :return: If date_after is superior to self.end_date, return an empty Series
         """
-        return self.value[date_after:]
+        if self._has_regular_index() and self._is_timestamp(date_after):
+            return self._get_values_between(date_after, None)
+        return self._flushed_value()[date_after:]
 
     @property
     def end_date(self) -> pd.Timestamp:
-        return self.value.index.max()
+        if self._has_regular_index():
+            return self._time_index.end
+        return self._flushed_value().index.max()
 
     @property
     def start_date(self) -> pd.Timestamp:
-        return self.value.index.min()
+        if self._has_regular_index():
+            return self._time_index.start
+        return self._flushed_value().index.min()
 
     @property
     def get_dates(self) -> np.ndarray:
-        return self.value.index.values
+        if self._has_regular_index():
+            return self._time_index.to_index().values
+        return self._flushed_value().index.values
 
 
 class ChemistryRecord(Record):
     """
     implementation of a Chemistry record. The main difference is that a chemetry record have a detection limit
     """
+    __slots__ = ('lower_detection_limit', 'report_date', 'analysis_type')
 
     def __init__(self, sampling_date: datetime.datetime = None,
                  parameter: str = None,
@@ -236,22 +546,266 @@ class ChemistryRecord(Record):
     @property
     def normalized_value(self) -> float:
         """
-        method returning a float value normalized by some business rules
+        method returning a float value normalized by some business rules.
+        See normalize_chemistry_values to normalize many values at once.
         :return:
         """
         assert self.value is not None, "no value for the record"
-        normal_value = float('nan')
+        normal_value, censoring = _parse_chemistry_value(self.value)
         # transform trace, not detected, nd, n.d, ...
         # by dividing the detection limit by 2
         # if there is no detection limit, the result is NaN
-        if re.search(r"^tr.*|n(.{0,1}|(ot).*)d.*|nan", self.value.lower()):
-            if self.lower_detection_limit is not None:
-                normal_value = float(self.lower_detection_limit) / 2.0
-        # transform values like <0.5 to 0.25 by divinding the result by two
-        elif re.search(r".*<.*", self.value):
-            normal_value = float(re.sub(r"[< ]", '', self.value)) / 2.0
-        # the result is just a result
-        elif not re.search(r"^tr.*|n.d.*|.*<.*", self.value):
-            normal_value = float(self.value)
+        if censoring == NOT_DETECTED and self.lower_detection_limit is not None:
+            normal_value = float(self.lower_detection_limit) / 2.0
         # todo : what to do with values above higher detection limit
         return normal_value
+
+
+class SampleTable(object):
+    """
+    Columnar store of the chemistry results of many samples.
+
+    The sample, analysis type, parameter and unit columns are stored as
+    integer codes of categories. The sampling date and report date columns
+    are stored as datetime64[ns] integers and the detection limit column
+    as floats. The few dates and detection limits that can't be converted,
+    like a 'N/A' detection limit, are kept as is on the side. The value
+    column holds the raw results, which mix numbers and strings like '<0.5',
+    and is stored as a list. The rows are indexed by (sample, parameter) and
+    by (sample, analysis type), so that the records of a sample can be found
+    without scanning the table.
+
+    The Sample objects bound to a table and their records are views over
+    the rows of the table. See SampleTableRecord.
+    """
+    CATEGORICAL_COLUMNS = ('sample', 'analysis_type', 'parameter', 'unit')
+    DATE_COLUMNS = ('sampling_date', 'report_date')
+    FLOAT_COLUMNS = ('detection_limit',)
+    COLUMNS = CATEGORICAL_COLUMNS + ('value', 'detection_limit', 'sampling_date', 'report_date')
+    _NAT = np.iinfo(np.int64).min
+
+    def __init__(self):
+        self._columns = {}
+        for column in self.COLUMNS:
+            if column in self.CATEGORICAL_COLUMNS:
+                self._columns[column] = array('i')
+            elif column in self.DATE_COLUMNS:
+                self._columns[column] = array('q')
+            elif column in self.FLOAT_COLUMNS:
+                self._columns[column] = array('d')
+            else:
+                self._columns[column] = []
+        self._category_codes = {column: {} for column in self.CATEGORICAL_COLUMNS}
+        self._categories = {column: [] for column in self.CATEGORICAL_COLUMNS}
+        # {(column, row): value} of the values that can't be stored in their typed column
+        self._raw_values = {}
+        self._sample_parameter_index = defaultdict(list)
+        self._sample_analysis_index = defaultdict(list)
+
+    def __len__(self) -> int:
+        return len(self._columns['value'])
+
+    def _encode(self, column: str, value) -> int:
+        codes = self._category_codes[column]
+        try:
+            return codes[value]
+        except KeyError:
+            codes[value] = len(self._categories[column])
+            self._categories[column].append(value)
+            return codes[value]
+
+    def _to_typed_value(self, column: str, value) -> typing.Tuple[typing.Union[int, float], bool]:
+        """
+        Convert a date or a detection limit to the type of its column.
+        :return: the converted value and True if the value couldn't be converted and must be
+        kept as is
+        """
+        if column in self.DATE_COLUMNS:
+            if value is None:
+                return self._NAT, False
+            if isinstance(value, (datetime.date, np.datetime64)):
+                timestamp = pd.Timestamp(value)
+                if timestamp.tz is None:
+                    return (self._NAT if timestamp is pd.NaT else timestamp.value), False
+            return self._NAT, True
+        if value is None:
+            return float('nan'), False
+        try:
+            return float(value), False
+        except (TypeError, ValueError):
+            return float('nan'), True
+
+    def _from_typed_value(self, column: str, row: int):
+        value = self._columns[column][row]
+        if column in self.DATE_COLUMNS:
+            return None if value == self._NAT else pd.Timestamp(value)
+        if column in self.FLOAT_COLUMNS:
+            return None if value != value else value
+        return value
+
+    def _extend_typed_column(self, column: str, first_row: int, values: typing.Sequence):
+        typed_values = self._columns[column]
+        for row, value in enumerate(values, first_row):
+            typed_value, is_raw = self._to_typed_value(column, value)
+            typed_values.append(typed_value)
+            if is_raw:
+                self._raw_values[(column, row)] = value
+
+    def add_records(self, sample: str, analysis_type: str,
+                    sampling_date: datetime.datetime,
+                    parameters: typing.Sequence[str],
+                    units: typing.Sequence[str],
+                    values: typing.Sequence,
+                    detection_limits: typing.Sequence,
+                    report_date: datetime.datetime) -> range:
+        """
+        Add the results of many parameters of a sample at once
+        :return: the rows of the new records
+        """
+        first_row = len(self)
+        nb_records = len(parameters)
+        columns = self._columns
+        columns['sample'].extend([self._encode('sample', sample)] * nb_records)
+        columns['analysis_type'].extend(
+            [self._encode('analysis_type', analysis_type)] * nb_records)
+        columns['parameter'].extend(self._encode('parameter', param) for param in parameters)
+        columns['unit'].extend(self._encode('unit', unit) for unit in units)
+        columns['value'].extend(values)
+        self._extend_typed_column('detection_limit', first_row, detection_limits)
+        # the dates are shared by all the records
+        for column, date in (('sampling_date', sampling_date), ('report_date', report_date)):
+            typed_date, is_raw = self._to_typed_value(column, date)
+            columns[column].extend([typed_date] * nb_records)
+            if is_raw:
+                self._raw_values.update(((column, row), date)
+                                        for row in range(first_row, first_row + nb_records))
+        rows = range(first_row, first_row + nb_records)
+        for row, parameter in zip(rows, parameters):
+            self._sample_parameter_index[(sample, parameter)].append(row)
+        self._sample_analysis_index[(sample, analysis_type)].extend(rows)
+        return rows
+
+    def get_value(self, column: str, row: int):
+        if column in self._categories:
+            return self._categories[column][self._columns[column][row]]
+        if self._raw_values:
+            try:
+                return self._raw_values[(column, row)]
+            except KeyError:
+                pass
+        return self._from_typed_value(column, row)
+
+    def set_value(self, column: str, row: int, value):
+        if column in self._categories:
+            sample = self.get_value('sample', row)
+            parameter = self.get_value('parameter', row)
+            analysis_type = self.get_value('analysis_type', row)
+            self._columns[column][row] = self._encode(column, value)
+            if column in ('sample', 'parameter'):
+                self._sample_parameter_index[(sample, parameter)].remove(row)
+                self._insert_row(self._sample_parameter_index[
+                    (self.get_value('sample', row), self.get_value('parameter', row))], row)
+            if column in ('sample', 'analysis_type'):
+                self._sample_analysis_index[(sample, analysis_type)].remove(row)
+                self._insert_row(self._sample_analysis_index[
+                    (self.get_value('sample', row), self.get_value('analysis_type', row))], row)
+        elif column in self.DATE_COLUMNS or column in self.FLOAT_COLUMNS:
+            self._columns[column][row], is_raw = self._to_typed_value(column, value)
+            if is_raw:
+                self._raw_values[(column, row)] = value
+            else:
+                self._raw_values.pop((column, row), None)
+        else:
+            self._columns[column][row] = value
+
+    @staticmethod
+    def _insert_row(rows: list, row: int):
+        # the rows of the indexes are kept in the order of the table
+        rows.append(row)
+        rows.sort()
+
+    def get_rows(self, sample: str, parameter: str = None, analysis_type: str = None) -> list:
+        """
+        Return the rows of the records of a sample, in the order of the table
+        :param parameter: if not None, only the rows of this parameter are returned
+        :param analysis_type: if not None, only the rows of this analysis type are returned
+        """
+        if parameter is None:
+            if analysis_type is not None:
+                return list(self._sample_analysis_index.get((sample, analysis_type), []))
+            return sorted(row for analysis_type in self._categories['analysis_type']
+                          for row in self._sample_analysis_index.get((sample, analysis_type), []))
+        rows = self._sample_parameter_index.get((sample, parameter), [])
+        if analysis_type is not None:
+            rows = [row for row in rows if self.get_value('analysis_type', row) == analysis_type]
+        return list(rows)
+
+    def get_records(self, sample: str, parameter: str = None,
+                    analysis_type: str = None) -> typing.List['SampleTableRecord']:
+        """
+        Return the records of a sample as views over the rows of the table.
+        See get_rows.
+        """
+        return [SampleTableRecord(self, row) for row in self.get_rows(sample, parameter, analysis_type)]
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Return the table as a DataFrame with categorical sample, analysis type,
+        parameter and unit columns, datetime64 date columns and a float detection
+        limit column. The dates and detection limits that couldn't be converted are NaT and NaN.
+        """
+        data = OrderedDict()
+        for column in self.COLUMNS:
+            if column in self._categories:
+                # the missing categories, like a None unit, get the code -1
+                categories = pd.Series(self._categories[column], dtype=object)
+                missing = categories.isnull().values
+                new_codes = np.cumsum(~missing) - 1
+                new_codes[missing] = -1
+                data[column] = pd.Categorical.from_codes(
+                    new_codes[np.frombuffer(self._columns[column], dtype=np.intc)],
+                    categories=pd.Index(categories[~missing], dtype=object))
+            elif column in self.DATE_COLUMNS:
+                data[column] = np.frombuffer(self._columns[column], dtype=np.int64).view('datetime64[ns]')
+            elif column in self.FLOAT_COLUMNS:
+                data[column] = np.frombuffer(self._columns[column], dtype=np.float64)
+            else:
+                data[column] = pd.Series(self._columns[column], dtype=object)
+        return pd.DataFrame(data)
+
+
+def _sample_table_column(column: str) -> property:
+    return property(lambda self: self._table.get_value(column, self._row),
+                    lambda self, value: self._table.set_value(column, self._row, value))
+
+
+class SampleTableRecord(ChemistryRecord):
+    """
+    ChemistryRecord view of a row of a SampleTable. Setting an attribute of
+    the record sets the value of the table.
+    """
+    __slots__ = ('_table', '_row')
+
+    def __init__(self, table: SampleTable, row: int):
+        self._table = table
+        self._row = row
+
+    record_date = _sample_table_column('sampling_date')
+    parameter = _sample_table_column('parameter')
+    parameter_unit = _sample_table_column('unit')
+    value = _sample_table_column('value')
+    lower_detection_limit = _sample_table_column('detection_limit')
+    report_date = _sample_table_column('report_date')
+    analysis_type = _sample_table_column('analysis_type')
+
+    @property
+    def parameter_as_string(self):
+        return Parameter(self.parameter, self.parameter_unit).__str__()
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, SampleTableRecord):
+            return self._table is other._table and self._row == other._row
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash((id(self._table), self._row))
@@ -7,16 +7,23 @@ __version__ = '1.0'
 
 import datetime
 from collections import namedtuple
-from typing import List
+from collections.abc import Sequence
+from typing import Callable, Iterable, List, Tuple, Union
 
 import numpy as np
 
-from pandas import DataFrame, Series
+from pandas import DataFrame, DatetimeIndex, Series, Timestamp, concat
 
 from .records import ChemistryRecord
+from .records import Parameter
+from .records import RegularTimeIndex
+from .records import SampleTable
+from .records import SampleTableRecord
 from .records import TimeSeriesRecords
 
-geographical_coordinates = namedtuple('XYZPoint', ['x', 'y', 'z'])
+XYZPoint = namedtuple('XYZPoint', ['x', 'y', 'z'])
+# The namedtuple is bound to its own name too, so that it can be pickled.
+geographical_coordinates = XYZPoint
 
 
 class Site(object):
@@ -42,6 +49,12 @@ class SensorPlateform(Site):
     Definition of a Sensor plateform site.
 
     A plateform is an object that can take measurement as a standalone object.
+
+    When the time series set with set_time_series are sampled at a regular interval, their dates
+    are kept as a RegularTimeIndex in time_index and the records DataFrame is built only when it is
+    read. Until then, get_dates, start_date, end_date and get_data_between use the time_index and
+    find the dates in O(1). Once built, the DataFrame can be modified by the caller, so the
+    time_index is dropped.
     """
 
     def __init__(self, site_name: str = None,
@@ -63,6 +76,31 @@ class SensorPlateform(Site):
         self.longest_time_series = None
         self._datetime_not_in_longest_time_series = []
 
+    @property
+    def records(self) -> DataFrame:
+        if self._compact_data is not None:
+            self._records = DataFrame(data=self._compact_data, index=self._time_index.to_index(),
+                                      columns=self._compact_columns, copy=False)
+            self._compact_data = None
+            self._compact_columns = None
+            self._time_index = None
+        return self._records
+
+    @records.setter
+    def records(self, value: DataFrame):
+        self._records = value
+        self._compact_data = None
+        self._compact_columns = None
+        self._time_index = None
+
+    @property
+    def time_index(self) -> Union[RegularTimeIndex, None]:
+        """
+        RegularTimeIndex of the records, or None if the records are not sampled at a
+        regular interval or if the records DataFrame was built.
+        """
+        return self._time_index
+
     @property
     def get_records(self) -> DataFrame:
         return self.records
@@ -73,8 +111,54 @@ class SensorPlateform(Site):
 
     @property
     def get_dates(self) -> np.ndarray:
+        if self._time_index is not None:
+            return self._time_index.to_index().values
         return self.records.index.values
 
+    @property
+    def start_date(self) -> Timestamp:
+        if self._time_index is not None:
+            return self._time_index.start
+        return self.records.index.min()
+
+    @property
+    def end_date(self) -> Timestamp:
+        if self._time_index is not None:
+            return self._time_index.end
+        return self.records.index.max()
+
+    def get_data_between(self, first_date: Union[datetime.datetime, str],
+                         last_date: Union[datetime.datetime, str]) -> DataFrame:
+        """
+        Return the records of the dates >= first_date and <= last_date
+        :param first_date: start date of the selection
+        :param last_date: end date of the selection
+        :return: DataFrame of the selected records
+        """
+        f_date = Timestamp(first_date)
+        l_date = Timestamp(last_date)
+        if f_date > l_date:
+            f_date, l_date = l_date, f_date
+        if self._time_index is not None:
+            positions = self._time_index.slice_between(f_date, l_date)
+            # the selection is copied, so that it can be modified without modifying the records
+            return DataFrame(data=self._compact_data[positions],
+                             index=self._time_index[positions].to_index(),
+                             columns=self._compact_columns, copy=True)
+        return self.records.loc[f_date:l_date]
+
+    def rename_columns(self, mapper: Union[dict, Callable[[str], str]]):
+        """
+        Rename the columns of the records, like DataFrame.rename, without building the records
+        DataFrame when it is kept with a time_index.
+        :param mapper: dict or function transforming the column names
+        """
+        if self._compact_data is not None:
+            self._compact_columns = [mapper(column) if callable(mapper) else mapper.get(column, column)
+                                     for column in self._compact_columns]
+        else:
+            self._records.rename(mapper, axis='columns', inplace=True)
+
     def create_time_serie(self, parameter, unit, dates: List[datetime.datetime], values: list):
         """
         Create a new TimeSerie and add id to the self.records DataFrame
@@ -93,29 +177,142 @@ class SensorPlateform(Site):
             # create a new dataframe
             self.records = DataFrame(data=time_serie.value, index=time_serie.get_dates,
                                         columns=[time_serie.parameter_as_string])
-        elif False in (time_serie.get_dates == self.records.index):
+        elif not self.records.index.equals(DatetimeIndex(time_serie.get_dates)):
             # If dates differs
             self.resample_records(new_time_serie=time_serie)
         else:
             # same dates and dataframe exist
             self.records[time_serie.parameter_as_string] = time_serie.value
 
+    def set_time_series(self, dates: Union[List[datetime.datetime], DatetimeIndex, np.ndarray],
+                        time_series: List[Tuple[str, str, Union[list, np.ndarray]]],
+                        name_format: str = None):
+        """
+        Create many time series sharing the same dates at once and add them to the
+        self.records DataFrame. The values of all the time series are copied in a
+        single 2D array, so that the DataFrame is built in one allocation.
+        :param dates: list of datetime objects shared by all the time series
+        :param time_series: list of (parameter, unit, values) tuples
+        :param name_format: format used to build the column names from the parameter
+        and the unit, e.g. '{} ({})'. By default, the columns are named like
+        TimeSeriesRecords.parameter_as_string.
+        :raise: ValueError if two time series have the same column name
+        :return:
+        """
+        index = DatetimeIndex(dates)
+        # the columns are checked without building the records DataFrame when it is kept compact
+        existing_columns = self._compact_columns if self._compact_data is not None else self._records.columns
+        columns = []
+        arrays = []
+        for parameter, unit, values in time_series:
+            if name_format is None:
+                column = str(Parameter(parameter, unit))
+            else:
+                column = name_format.format(parameter, unit)
+            if column in existing_columns or column in columns:
+                raise ValueError('time serie with the same parameter allready exist')
+            values = np.asarray(values)
+            if len(values) != len(index):
+                raise ValueError("Dates and values of parameter '{}' are not the same size".format(parameter))
+            columns.append(column)
+            arrays.append(values)
+
+        data = np.empty((len(index), len(arrays)),
+                        dtype=np.result_type(*arrays) if arrays else float)
+        for i, values in enumerate(arrays):
+            data[:, i] = values
+
+        if self._compact_data is None and len(self._records.index) == 0:
+            time_index = RegularTimeIndex.from_dates(index)
+            if time_index is not None and arrays:
+                # the records DataFrame is built when it is read
+                self.records = DataFrame()
+                self._compact_data = data
+                self._compact_columns = columns
+                self._time_index = time_index
+                return
+        new_records = DataFrame(data=data, index=index, columns=columns, copy=False)
+
+        if len(self.records.index) == 0:
+            self.records = new_records
+        elif self.records.index.equals(new_records.index):
+            self.records = concat([self.records, new_records], axis=1)
+        else:
+            self.merge_time_series([(column, None, index, new_records[column].values)
+                                    for column in columns], name_format='{}')
+
+    def merge_time_series(self, time_series: List[Tuple[str, str,
+                                                        Union[List[datetime.datetime], DatetimeIndex, np.ndarray],
+                                                        Union[list, np.ndarray]]],
+                          name_format: str = None):
+        """
+        Merge many time series sampled at different dates with the self.records DataFrame in a
+        single pass. The index of the new records is the union of the dates of all the time series
+        and of the existing records, built with a k-way merge of their sorted dates. The values of
+        each time series are then scattered in a preallocated 2D array, with NaN at the dates where
+        a time series has no value.
+        :param time_series: list of (parameter, unit, dates, values) tuples
+        :param name_format: format used to build the column names from the parameter
+        and the unit. See set_time_series.
+        :raise: ValueError if two time series have the same column name or if a time serie has
+        duplicated dates
+        :return:
+        """
+        columns = list(self.records.columns)
+        channels = [(self.records.index, self.records[column].values) for column in columns]
+        for parameter, unit, dates, values in time_series:
+            if name_format is None:
+                column = str(Parameter(parameter, unit))
+            else:
+                column = name_format.format(parameter, unit)
+            if column in columns:
+                raise ValueError('time serie with the same parameter allready exist')
+            columns.append(column)
+            channels.append((dates, values))
+
+        sorted_channels = []
+        for column, (dates, values) in zip(columns, channels):
+            dates = DatetimeIndex(dates).values.astype('datetime64[ns]')
+            values = np.asarray(values)
+            if values.dtype.kind in 'US':
+                # strings can't be mixed with the NaN of the missing values
+                values = values.astype(object)
+            if len(values) != len(dates):
+                raise ValueError("Dates and values of a time serie are not the same size")
+            if (dates[1:] < dates[:-1]).any():
+                order = np.argsort(dates, kind='stable')
+                dates = dates[order]
+                values = values[order]
+            if (dates[1:] == dates[:-1]).any():
+                raise ValueError("time serie '{}' has duplicated dates".format(column))
+            sorted_channels.append((dates, values))
+
+        # The stable sort merges the sorted runs of dates of the k time series.
+        union_dates = np.concatenate([dates for dates, _ in sorted_channels]) \
+            if sorted_channels else np.array([], dtype='datetime64[ns]')
+        union_dates.sort(kind='stable')
+        if len(union_dates) > 0:
+            union_dates = union_dates[np.concatenate(([True], union_dates[1:] != union_dates[:-1]))]
+
+        dtype = np.result_type(*[values.dtype for _, values in sorted_channels]) \
+            if sorted_channels else np.dtype(float)
+        if dtype.kind in 'biu':
+            # the missing values are NaN
+            dtype = np.result_type(dtype, np.float64)
+        data = np.full((len(union_dates), len(sorted_channels)), np.nan, dtype=dtype)
+        for i, (dates, values) in enumerate(sorted_channels):
+            data[np.searchsorted(union_dates, dates), i] = values
+        self.records = DataFrame(data=data, index=DatetimeIndex(union_dates), columns=columns,
+                                 copy=False)
+
     def resample_records(self, new_time_serie: TimeSeriesRecords):
         """
         Create a new dataframe by appending a new TimeSeriesRecords
         :param new_time_serie: TimeSeriesRecords to append
         """
-        new_data_frame = DataFrame(data=new_time_serie.value,
-                                      index=new_time_serie.get_dates,
-                                      columns=[new_time_serie.parameter_as_string])
-
-        new_time_delta = new_data_frame.index[1] - new_data_frame.index[0]
-        old_time_delta = self.records.index[1] - self.records.index[0]
-        # The timeDelta of the new TimeSeriesRecords is lower
-        if old_time_delta > new_time_delta:
-            self.records = new_data_frame.combine_first(self.records)
-        else:
-            self.records = self.records.combine_first(new_data_frame)
+        self.merge_time_series([(new_time_serie.parameter_as_string, None,
+                                 new_time_serie.get_dates, new_time_serie.value.values)],
+                               name_format='{}')
 
     def __str__(self) -> str:
         return "({serial}):{site} - {date}".format(serial=self.instrument_serial_number,
@@ -123,10 +320,65 @@ class SensorPlateform(Site):
                                                    date=self.visit_date)
 
 
+class SampleTableRecords(Sequence):
+    """
+    List-like view of the records of a Sample bound to a SampleTable.
+
+    Appending a record to the view adds a row to the table and setting a record of the view
+    sets the values of its row. In both cases the values of the record are copied in the table.
+    The records can't be removed from the table.
+    """
+
+    def __init__(self, sample: 'Sample'):
+        self._sample = sample
+        self._rows = sample.table.get_rows(sample.site_name, analysis_type=sample.analysis_type)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __getitem__(self, item) -> Union[SampleTableRecord, List[SampleTableRecord]]:
+        if isinstance(item, slice):
+            return [SampleTableRecord(self._sample.table, row) for row in self._rows[item]]
+        return SampleTableRecord(self._sample.table, self._rows[item])
+
+    def __setitem__(self, index: int, record: ChemistryRecord):
+        table = self._sample.table
+        row = self._rows[index]
+        for column, value in (('sampling_date', record.sampling_date),
+                              ('parameter', record.parameter),
+                              ('unit', record.parameter_unit),
+                              ('value', record.value),
+                              ('detection_limit', record.lower_detection_limit),
+                              ('report_date', record.report_date)):
+            table.set_value(column, row, value)
+
+    def __delitem__(self, index):
+        raise TypeError("the records can't be removed from a SampleTable")
+
+    def append(self, record: ChemistryRecord):
+        self.extend([record])
+
+    def extend(self, records: Iterable[ChemistryRecord]):
+        sample = self._sample
+        for record in records:
+            # the record is kept in the view of the sample
+            analysis_type = record.analysis_type if sample.analysis_type is None else sample.analysis_type
+            self._rows.extend(sample.table.add_records(
+                sample.site_name, analysis_type, record.sampling_date, [record.parameter],
+                [record.parameter_unit], [record.value], [record.lower_detection_limit],
+                record.report_date))
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
 class Sample(Site):
     """
     Definition of a Sample as seen as a laboratory information. This represent the minimal informations
     given to/by the lab.
+
+    When the sample is bound to a SampleTable, its records are stored in the table and the sample
+    is a view over the rows of its site name and analysis type.
     """
 
     def __init__(self, site_name: str = None,
@@ -134,7 +386,8 @@ class Sample(Site):
                  lab_sample_name: str = None,
                  sample_type: str = None,
                  analysis_type: str = None,
-                 project_name: str = None):
+                 project_name: str = None,
+                 table: SampleTable = None):
         """
         initialization of a sample
         :param site_name: site name
@@ -143,22 +396,38 @@ class Sample(Site):
         :param sample_type: sample type (blank, sample, duplicate,...)
         :param analysis_type: analysis type
         :param project_name: project name
+        :param table: table where the records of the sample are stored
         """
         super().__init__(site_name, visit_date, project_name)
         self.lab_sample_name = lab_sample_name
         self.sample_type = sample_type
-        self.records = []  # list(ChemistryRecord)
+        self.table = table
+        self._records = []  # list(ChemistryRecord), when the sample isn't bound to a table
         self.analysis_type = analysis_type
 
-    def get_records(self) -> List[ChemistryRecord]:
+    @property
+    def records(self) -> Union[List[ChemistryRecord], SampleTableRecords]:
+        if self.table is None:
+            return self._records
+        return SampleTableRecords(self)
+
+    def get_records(self) -> Union[List[ChemistryRecord], SampleTableRecords]:
         return self.records
 
     def create_new_record(self) -> ChemistryRecord:
+        if self.table is not None:
+            row = self.table.add_records(self.site_name, self.analysis_type, None,
+                                         [None], [None], [None], [None], None)[0]
+            return SampleTableRecord(self.table, row)
         new_rec = ChemistryRecord()
-        self.records.append(new_rec)
-        return self.records[-1]
+        self._records.append(new_rec)
+        return self._records[-1]
 
     def create_complete_record(self, samp_date, param, param_unit, value, detect_lim, report_date, ana_type):
+        if self.table is not None:
+            self.create_complete_records(samp_date, [param], [param_unit], [value], [detect_lim],
+                                         report_date, ana_type)
+            return
         new_rec = ChemistryRecord(sampling_date=samp_date,
                                   parameter=param,
                                   parameter_unit=param_unit,
@@ -166,9 +435,35 @@ class Sample(Site):
                                   detection_limit=detect_lim,
                                   report_date=report_date,
                                   analysis_type=ana_type)
-        self.records.append(new_rec)
+        self._records.append(new_rec)
+
+    def create_complete_records(self, samp_date, params, param_units, values, detect_lims,
+                                report_date, ana_type):
+        """
+        create the records of many parameters at once
+        :param params: parameters analyzed
+        :param param_units: units of the parameters
+        :param values: obtained values
+        :param detect_lims: detection limits of the parameters
+        """
+        if self.table is not None:
+            self.table.add_records(self.site_name, ana_type, samp_date, params, param_units,
+                                   values, detect_lims, report_date)
+            return
+        self._records.extend(ChemistryRecord(sampling_date=samp_date,
+                                            parameter=param,
+                                            parameter_unit=param_unit,
+                                            value=value,
+                                            detection_limit=detect_lim,
+                                            report_date=report_date,
+                                            analysis_type=ana_type)
+                            for param, param_unit, value, detect_lim
+                            in zip(params, param_units, values, detect_lims))
 
     def get_record_by_parameter(self, p_parameter) -> ChemistryRecord:
+        if self.table is not None:
+            records = self.table.get_records(self.site_name, p_parameter, self.analysis_type)
+            return records[0] if records else None
         record = None
         for rec in self.get_records():
             if rec.parameter == p_parameter:
@@ -9,7 +9,9 @@ import itertools
 import math
 import unittest
 
-from hydsensread.site_and_records.records import ChemistryRecord
+import numpy as np
+
+from hydsensread.site_and_records.records import ChemistryRecord, normalize_chemistry_values
 
 
 class ChemistryRecordsTest(unittest.TestCase):
@@ -43,5 +45,39 @@ class ChemistryRecordsTest(unittest.TestCase):
             self.chem_rec.value = str(j)
             self.assertEqual(self.chem_rec.normalized_value,j)
 
+    def test_normalize_chemistry_values(self):
+        values = ['< 1', ' 2 ', 'nd', 'Trace', None, 3.5, 'n.d.', 'bad']
+        detection_limits = [None, 1, 0.4, '0.2', 1, 1, None, None]
+        normalized = normalize_chemistry_values(values, detection_limits, errors='coerce')
+        np.testing.assert_array_equal(normalized['normalized_value'],
+                                      [0.5, 2, 0.2, 0.1, np.nan, 3.5, np.nan, np.nan])
+        self.assertEqual(normalized['censored'].tolist(),
+                         [True, False, True, True, False, False, True, False])
+        for value, detection_limit, normalized_value in zip(
+                values[:4], detection_limits, normalized['normalized_value']):
+            self.assertEqual(ChemistryRecord(value=value,
+                                             detection_limit=detection_limit).normalized_value,
+                             normalized_value)
+        with self.assertRaises(ValueError):
+            normalize_chemistry_values(values, detection_limits)
+
+    def test_normalize_nan_chemistry_values(self):
+        values = [np.nan, float('nan'), 'nan', 'NaN', '1.5', np.nan]
+        detection_limits = [1, 0.4, 0.2, '0.6', 1, None]
+        normalized = normalize_chemistry_values(values, detection_limits)
+        np.testing.assert_array_equal(normalized['normalized_value'],
+                                      [0.5, 0.2, 0.1, 0.3, 1.5, np.nan])
+        self.assertEqual(normalized['censored'].tolist(),
+                         [True, True, True, True, False, True])
+        for value, detection_limit, normalized_value in zip(
+                values, detection_limits, normalized['normalized_value']):
+            np.testing.assert_equal(ChemistryRecord(value=value,
+                                                    detection_limit=detection_limit).normalized_value,
+                                    normalized_value)
+        # None is a missing result
+        normalized = normalize_chemistry_values([None, np.nan], [1, 1])
+        np.testing.assert_array_equal(normalized['normalized_value'], [np.nan, 0.5])
+        self.assertEqual(normalized['censored'].tolist(), [False, True])
+
 suite = unittest.TestLoader().loadTestsFromTestCase(ChemistryRecordsTest)
 unittest.TextTestRunner(verbosity=2).run(suite)
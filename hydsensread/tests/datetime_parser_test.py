@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import numpy as np
+import pandas as pd
+import xlrd
+
+from hydsensread.file_parser.datetime_parser import (
+    SOLINST_CSV_DATETIME_FORMATS, infer_datetime_format,
+    parse_date_components, parse_datetime_columns, xldates_as_datetime64)
+
+
+class DatetimeParserTest(unittest.TestCase):
+    def test_infer_format(self):
+        self.assertEqual(infer_datetime_format(['2017/05/03 13:00:00.0']),
+                         '%Y/%m/%d %H:%M:%S.%f')
+        self.assertEqual(infer_datetime_format(['2017-02-22 12:30:00']),
+                         '%Y-%m-%d %H:%M:%S')
+        self.assertIsNone(infer_datetime_format(['not a date']))
+
+    def test_parse_date_and_time_columns(self):
+        dates = parse_datetime_columns(['2017/05/03', '2017/05/03'],
+                                       ['13:00:00', '13:15:00'],
+                                       ['0', '5'],
+                                       seps=(' ', '.'),
+                                       formats=SOLINST_CSV_DATETIME_FORMATS)
+        expected = pd.DatetimeIndex(['2017-05-03 13:00:00',
+                                     '2017-05-03 13:15:00.5'])
+        self.assertTrue(dates.equals(expected))
+
+    def test_parse_with_errors_coerce(self):
+        dates = parse_datetime_columns(['2017-02-22 12:30:00', 'END'],
+                                       errors='coerce')
+        self.assertEqual(dates[0], pd.Timestamp('2017-02-22 12:30:00'))
+        self.assertTrue(pd.isnull(dates[1]))
+
+    def test_parse_date_components(self):
+        dates = parse_date_components(['1972.0', '2016'], ['1.0', '12'],
+                                      ['1.0', '31'])
+        expected = pd.DatetimeIndex(['1972-01-01', '2016-12-31'])
+        self.assertTrue(dates.equals(expected))
+
+    def test_xldates_as_datetime64(self):
+        xldates = [0.5, 59.75, 60.0, 43000.123456789, 42000.99999999]
+        for datemode in (0, 1):
+            dates = xldates_as_datetime64(xldates, datemode)
+            expected = [xlrd.xldate.xldate_as_datetime(xldate, datemode)
+                        for xldate in xldates]
+            self.assertEqual(dates.dtype, np.dtype('datetime64[ms]'))
+            self.assertEqual(dates.astype(object).tolist(), expected)
+
+
+suite = unittest.TestLoader().loadTestsFromTestCase(DatetimeParserTest)
+unittest.TextTestRunner(verbosity=2).run(suite)
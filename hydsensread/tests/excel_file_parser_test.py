@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os.path as osp
+import unittest
+
+from hydsensread.file_parser import EXCELFileParser
+from hydsensread.file_parser.concrete_file_parser import LazySheetMapping
+
+FILE_EXAMPLE_DIR = osp.join(osp.dirname(osp.dirname(__file__)), 'file_example')
+
+
+class LazySheetMappingTest(unittest.TestCase):
+    def setUp(self):
+        self.loaded = []
+
+        def load_sheet(sheet_name):
+            self.loaded.append(sheet_name)
+            return [[sheet_name]]
+
+        self.sheets = LazySheetMapping(['first', 'second'], load_sheet)
+
+    def test_sheets_are_loaded_on_first_access(self):
+        self.assertEqual(list(self.sheets), ['first', 'second'])
+        self.assertIn('second', self.sheets)
+        self.assertEqual(self.loaded, [])
+        self.assertEqual(self.sheets['second'], [['second']])
+        self.assertEqual(self.sheets['second'], [['second']])
+        self.assertEqual(self.loaded, ['second'])
+
+    def test_unknown_sheet(self):
+        with self.assertRaises(KeyError):
+            self.sheets['third']
+
+    def test_close(self):
+        closed = []
+        sheets = LazySheetMapping(['first', 'second'], lambda name: [[name]],
+                                  close=lambda: closed.append(True))
+        self.assertEqual(sheets['first'], [['first']])
+        self.assertEqual(closed, [])
+        sheets.close()
+        self.assertEqual(closed, [True])
+        self.assertEqual(list(sheets), ['first'])
+        self.assertEqual(sheets['first'], [['first']])
+        with self.assertRaises(KeyError):
+            sheets['second']
+
+
+class EXCELFileParserTest(unittest.TestCase):
+    def test_sheets_are_not_shared_between_instances(self):
+        xls_parser = EXCELFileParser(osp.join(FILE_EXAMPLE_DIR, 'LOG001_1011105528.xls'))
+        xls_parser.read_file()
+        xlsx_parser = EXCELFileParser(osp.join(FILE_EXAMPLE_DIR, 'maxxam_sheet.xlsx'))
+        xlsx_parser.read_file()
+
+        self.assertFalse(hasattr(EXCELFileParser, 'sheet1'))
+        self.assertIs(xls_parser.sheet1, xls_parser.get_file_content[' Lot Info '])
+        self.assertIsNot(xls_parser.sheet1, xlsx_parser.sheet1)
+        with self.assertRaises(AttributeError):
+            xls_parser.sheet3
+
+    def test_sheet_filter(self):
+        xls_parser = EXCELFileParser(osp.join(FILE_EXAMPLE_DIR, 'LOG001_1011105528.xls'),
+                                     sheet_filter='Log data')
+        xls_parser.read_file()
+        self.assertEqual(list(xls_parser.get_file_content), [' Log data - 1'])
+        self.assertEqual(xls_parser.nb_sheets, 1)
+
+        xlsx_parser = EXCELFileParser(osp.join(FILE_EXAMPLE_DIR, 'maxxam_sheet.xlsx'),
+                                      sheet_filter='(?i)result')
+        xlsx_parser.read_file()
+        for sheet_name, sheet_content in xlsx_parser.get_file_content.items():
+            self.assertIn('result', sheet_name.lower())
+            self.assertIsInstance(sheet_content[0], list)
+
+    def test_close(self):
+        xlsx_parser = EXCELFileParser(osp.join(FILE_EXAMPLE_DIR, 'maxxam_sheet.xlsx'))
+        xlsx_parser.read_file()
+        sheet_name = list(xlsx_parser.get_file_content)[0]
+        sheet_content = xlsx_parser.get_file_content[sheet_name]
+        xlsx_parser.close()
+        self.assertEqual(list(xlsx_parser.get_file_content), [sheet_name])
+        self.assertEqual(xlsx_parser.nb_sheets, 1)
+        self.assertIs(xlsx_parser.get_file_content[sheet_name], sheet_content)
+
+
+suite = unittest.TestLoader().loadTestsFromTestCase(LazySheetMappingTest)
+unittest.TextTestRunner(verbosity=2).run(suite)
+suite = unittest.TestLoader().loadTestsFromTestCase(EXCELFileParserTest)
+unittest.TextTestRunner(verbosity=2).run(suite)
@@ -8,7 +8,7 @@ __version__ = '1.0'
 import datetime
 import unittest
 
-from hydsensread.site_and_records.records import Record
+from hydsensread.site_and_records.records import Parameter, Record
 
 
 class Recordtest(unittest.TestCase):
@@ -30,5 +30,18 @@ class Recordtest(unittest.TestCase):
         self.rec.record_date = now
         self.assertEqual(self.rec.record_date, now)
 
+    def test_parameters_are_interned(self):
+        other_rec = Record(parameter='test param', parameter_unit='mg/L')
+        self.rec.parameter = 'test param'
+        self.rec.parameter_unit = 'mg/L'
+        self.assertIs(self.rec._parameter, other_rec._parameter)
+        self.assertIs(Parameter('test param', 'mg/L'), other_rec._parameter)
+        self.assertEqual(self.rec.parameter_as_string, 'test param_mg/L')
+        # setting the parameter of a record doesn't change the shared parameter
+        self.rec.parameter_unit = 'ug/L'
+        self.assertEqual(other_rec.parameter_unit, 'mg/L')
+        self.assertEqual(self.rec.parameter_as_string, 'test param_ug/L')
+        self.assertFalse(hasattr(self.rec, '__dict__'))
+
 suite = unittest.TestLoader().loadTestsFromTestCase(Recordtest)
 unittest.TextTestRunner(verbosity=2).run(suite)
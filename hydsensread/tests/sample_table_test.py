@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import datetime
+import unittest
+
+import numpy as np
+
+from hydsensread.site_and_records import ChemistryRecord, Sample, SampleTable
+
+
+class SampleTableTest(unittest.TestCase):
+    def setUp(self):
+        self.table = SampleTable()
+        self.sampling_date = datetime.datetime(2016, 8, 9, 10)
+        self.report_date = datetime.datetime(2016, 8, 18)
+        self.metals = Sample('PO-09', self.sampling_date, analysis_type='metals', table=self.table)
+        self.metals.create_complete_records(self.sampling_date, ['Al', 'Fe'], ['ug/L', 'ug/L'],
+                                            ['<10', '250'], [10, 50], self.report_date, 'metals')
+        self.other = Sample('PO-10', self.sampling_date, analysis_type='metals', table=self.table)
+        self.other.create_complete_record(self.sampling_date, 'Al', 'ug/L', '30', 10,
+                                          self.report_date, 'metals')
+
+    def test_sample_records_are_views(self):
+        self.assertEqual(len(self.table), 3)
+        self.assertEqual([rec.parameter for rec in self.metals.records], ['Al', 'Fe'])
+        record = self.metals.get_record_by_parameter('Fe')
+        self.assertEqual(record.value, '250')
+        self.assertEqual(record.lower_detection_limit, 50)
+        self.assertEqual(record.sampling_date, self.sampling_date)
+        self.assertEqual(record.report_date, self.report_date)
+        self.assertEqual(record.parameter_as_string, 'Fe_ug/L')
+        self.assertEqual(self.metals.get_record_by_parameter('Al').normalized_value, 5)
+        self.assertIsNone(self.metals.get_record_by_parameter('Cu'))
+
+        record.value = '260'
+        self.assertEqual(self.metals.records[1].value, '260')
+        record.parameter = 'Cu'
+        self.assertEqual(self.metals.get_record_by_parameter('Cu').value, '260')
+        self.assertIsNone(self.metals.get_record_by_parameter('Fe'))
+
+    def test_append_to_sample_records(self):
+        records = self.metals.records
+        records.append(ChemistryRecord(self.sampling_date, 'Cu', 'ug/L', '2', '0.5',
+                                       self.report_date, 'metals'))
+        self.assertEqual(len(self.table), 4)
+        self.assertEqual(len(records), 3)
+        self.assertEqual([rec.parameter for rec in self.metals.records], ['Al', 'Fe', 'Cu'])
+        self.assertEqual(self.metals.get_record_by_parameter('Cu').lower_detection_limit, 0.5)
+        self.assertEqual(len(self.other.records), 1)
+
+        records[0] = ChemistryRecord(self.sampling_date, 'Zn', 'mg/L', '7', 'N/A',
+                                     None, 'metals')
+        record = self.metals.records[0]
+        self.assertEqual((record.parameter, record.parameter_unit, record.value), ('Zn', 'mg/L', '7'))
+        self.assertEqual(record.lower_detection_limit, 'N/A')
+        self.assertIsNone(record.report_date)
+        self.assertIsNone(self.metals.get_record_by_parameter('Al'))
+        with self.assertRaises(TypeError):
+            del records[0]
+
+    def test_typed_columns(self):
+        self.metals.create_complete_records('2016-08-09', ['Cu', 'Zn'], ['ug/L', 'ug/L'],
+                                            ['2', '3'], [None, 'N/A'], None, 'metals')
+        record = self.metals.get_record_by_parameter('Cu')
+        self.assertEqual(record.sampling_date, '2016-08-09')
+        self.assertIsNone(record.lower_detection_limit)
+        self.assertIsNone(record.report_date)
+        self.assertEqual(self.metals.get_record_by_parameter('Zn').lower_detection_limit, 'N/A')
+
+        records = self.table.to_dataframe()
+        self.assertEqual(records['detection_limit'].dtype, np.float64)
+        np.testing.assert_array_equal(records['detection_limit'], [10, 50, 10, np.nan, np.nan])
+        self.assertEqual(records['sampling_date'].dtype, 'datetime64[ns]')
+        self.assertEqual(records['sampling_date'].isnull().tolist(), [False, False, False, True, True])
+
+    def test_to_dataframe(self):
+        records = self.table.to_dataframe()
+        self.assertEqual(list(records.columns), list(SampleTable.COLUMNS))
+        for column in SampleTable.CATEGORICAL_COLUMNS:
+            self.assertEqual(records[column].dtype.name, 'category')
+        self.assertEqual(records['sample'].tolist(), ['PO-09', 'PO-09', 'PO-10'])
+        self.assertEqual(records['value'].tolist(), ['<10', '250', '30'])
+        self.assertEqual(records['report_date'].tolist(), [self.report_date] * 3)
+
+    def test_sample_without_table(self):
+        sample = Sample('PO-09', analysis_type='metals')
+        sample.create_complete_record(None, 'Al', 'ug/L', '30', 10, None, 'metals')
+        self.assertEqual(sample.get_record_by_parameter('Al').value, '30')
+        self.assertEqual(len(self.table), 3)
+
+
+suite = unittest.TestLoader().loadTestsFromTestCase(SampleTableTest)
+unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from hydsensread.site_and_records import SensorPlateform
+
+
+class SensorPlateformTest(unittest.TestCase):
+    def setUp(self):
+        self.plateform = SensorPlateform()
+        self.level_dates = pd.date_range('2017-01-01', periods=24, freq='15min')
+        self.temp_dates = pd.date_range('2017-01-01', periods=6, freq='h')
+        # irregular and unsorted dates
+        self.cond_dates = pd.DatetimeIndex(['2017-01-01 05:50', '2017-01-01 00:07',
+                                            '2017-01-01 03:00', '2017-01-02'])
+        self.plateform.set_time_series(self.level_dates, [('level', 'm', np.arange(24.))])
+
+    def test_regular_time_index(self):
+        time_index = self.plateform.time_index
+        self.assertIsNotNone(time_index)
+        self.assertEqual((time_index.start, time_index.step, len(time_index)),
+                         (self.level_dates[0], pd.Timedelta('15min'), 24))
+        self.assertEqual(self.plateform.start_date, self.level_dates[0])
+        self.assertEqual(self.plateform.end_date, self.level_dates[-1])
+        selection = self.plateform.get_data_between('2017-01-01 05:00', '2017-01-01 01:50')
+        self.assertEqual(selection.index.tolist(), self.level_dates[8:21].tolist())
+        self.assertEqual(selection['level_m'].tolist(), list(np.arange(8., 21.)))
+        selection.iloc[0, 0] = -1.
+        self.plateform.rename_columns({'level_m': 'level (m)'})
+        # the records DataFrame isn't built by the date queries
+        self.assertIs(self.plateform.time_index, time_index)
+
+        records = self.plateform.records
+        self.assertTrue(records.index.equals(self.level_dates))
+        self.assertEqual(list(records.columns), ['level (m)'])
+        self.assertEqual(records['level (m)'].tolist(), list(np.arange(24.)))
+        # the records can be modified once read, so the time index is dropped
+        self.assertIsNone(self.plateform.time_index)
+        records.loc[pd.Timestamp('2017-02-01')] = 1.
+        self.assertEqual(self.plateform.end_date, pd.Timestamp('2017-02-01'))
+        self.assertEqual(len(self.plateform.get_data_between('2017-01-01 05:00', '2017-03-01')), 5)
+
+    def test_irregular_time_index(self):
+        plateform = SensorPlateform()
+        plateform.set_time_series(self.cond_dates, [('cond', 'uS/cm', np.arange(4.))])
+        self.assertIsNone(plateform.time_index)
+        self.assertEqual(plateform.start_date, pd.Timestamp('2017-01-01 00:07'))
+
+    def test_set_time_series_same_parameter_other_unit(self):
+        self.plateform.set_time_series(self.level_dates, [('temp', 'degC', np.arange(24.)),
+                                                          ('temp', 'degF', np.arange(24.))])
+        self.assertEqual(list(self.plateform.records.columns), ['level_m', 'temp_degC', 'temp_degF'])
+
+    def test_set_time_series_duplicated_column(self):
+        with self.assertRaises(ValueError):
+            self.plateform.set_time_series(self.level_dates, [('temp', 'degC', np.arange(24.)),
+                                                              ('temp', 'degC', np.arange(24.))])
+        with self.assertRaises(ValueError):
+            self.plateform.set_time_series(self.level_dates, [('level', 'm', np.arange(24.))])
+        # the columns are checked without building the records DataFrame
+        self.assertIsNotNone(self.plateform.time_index)
+
+    def test_merge_time_series(self):
+        self.plateform.merge_time_series([
+            ('temp', 'degC', self.temp_dates, np.arange(6)),
+            ('cond', 'uS/cm', self.cond_dates, np.array([1., 2., 3., 4.]))])
+        records = self.plateform.records
+
+        expected = pd.concat([pd.Series(np.arange(24.), self.level_dates, name='level_m'),
+                              pd.Series(np.arange(6.), self.temp_dates, name='temp_degC'),
+                              pd.Series([1., 2., 3., 4.], self.cond_dates, name='cond_uS/cm')],
+                             axis=1).sort_index()
+        pd.testing.assert_frame_equal(records, expected, check_freq=False)
+        self.assertTrue(records.index.is_monotonic_increasing)
+        self.assertTrue(records.index.is_unique)
+
+    def test_merge_existing_parameter(self):
+        with self.assertRaises(ValueError):
+            self.plateform.merge_time_series([('level', 'm', self.temp_dates, np.arange(6.))])
+
+    def test_merge_duplicated_dates(self):
+        with self.assertRaises(ValueError):
+            self.plateform.merge_time_series([('temp', 'degC', self.temp_dates[[0, 1, 1]],
+                                               np.arange(3.))])
+        self.assertEqual(list(self.plateform.records.columns), ['level_m'])
+
+    def test_create_time_serie_with_other_dates(self):
+        self.plateform.create_time_serie('temp', 'degC', self.temp_dates[1:], np.arange(5.))
+        records = self.plateform.records
+        self.assertEqual(list(records.columns), ['level_m', 'temp_degC'])
+        self.assertEqual(len(records), 24)
+        self.assertEqual(records['temp_degC'].count(), 5)
+        self.assertEqual(records.loc[self.temp_dates[2], 'temp_degC'], 1)
+
+
+suite = unittest.TestLoader().loadTestsFromTestCase(SensorPlateformTest)
+unittest.TextTestRunner(verbosity=2).run(suite)
@@ -7,7 +7,7 @@ import unittest
 import numpy as np
 import pandas as pd
 
-from hydsensread.site_and_records.records import TimeSeriesRecords
+from hydsensread.site_and_records.records import RegularTimeIndex, TimeSeriesRecords
 
 
 class TimeSeriesRecordsTest(unittest.TestCase):
@@ -21,6 +21,89 @@ class TimeSeriesRecordsTest(unittest.TestCase):
         new_serie.set_time_serie_values(self.dates, self.vals)
         self.assertEqual(new_serie.value.all(), self.ts.value.all())
 
+    def test_values_dtype(self):
+        values = [1, None, 2.0, 3, 4]
+        regular_serie = TimeSeriesRecords(self.dates[:5], values)
+        irregular_serie = TimeSeriesRecords(self.dates[[0, 1, 2, 3, 5]], values)
+        self.assertEqual(regular_serie.value.dtype, np.float64)
+        self.assertEqual(regular_serie.value.dtype, irregular_serie.value.dtype)
+        self.assertTrue(np.isnan(regular_serie.get_data_at_time(self.dates[1])))
+
+    def test_modified_values(self):
+        new_date = pd.Timestamp('2012-01-01')
+        self.assertEqual(self.ts.end_date, self.dates[-1])
+        self.ts.value.loc[new_date] = 1.
+        self.assertEqual(self.ts.end_date, new_date)
+        self.assertEqual(len(self.ts.get_data_after_date(self.dates[-1])), 2)
+        with self.assertWarns(UserWarning):
+            self.ts.set_time_serie_values([new_date], [2.])
+        self.assertEqual(self.ts.get_data_at_time(new_date), 1.)
+
+    def test_set_empty_values(self):
+        new_serie = TimeSeriesRecords()
+        new_serie.set_time_serie_values([], [])
+        self.assertEqual(len(new_serie.value), 0)
+        new_serie.set_time_serie_values(self.dates[:10], self.vals[:10])
+        new_serie.set_time_serie_values([], [])
+        self.assertEqual(len(new_serie.value), 10)
+
+    def test_set_values_by_chunks(self):
+        new_serie = TimeSeriesRecords()
+        for start in (20, 0, 40):
+            new_serie.set_time_serie_values(self.dates[start:start + 10], self.vals[start:start + 10])
+        self.assertEqual(len(new_serie.value), 30)
+        new_serie.set_time_serie_values(self.dates[10:20], self.vals[10:20])
+        self.assertEqual(new_serie.value[self.dates[15]], self.vals[15])
+
+        # the chunks with a date already in the time serie are not added
+        for dates, vals in [(self.dates[8:12], self.vals[8:12]),
+                            (self.dates[[30, 30]], self.vals[30:32])]:
+            with self.assertWarns(UserWarning):
+                new_serie.set_time_serie_values(dates, vals)
+        self.assertEqual(len(new_serie.value), 40)
+        self.assertTrue(new_serie.value.index.is_unique)
+
+    def test_read_values_between_chunks(self):
+        new_serie = TimeSeriesRecords()
+        new_serie.set_time_serie_values(self.dates[:10], self.vals[:10])
+        new_serie.set_time_serie_values(self.dates[10:20], self.vals[10:20])
+        sorted_dates = new_serie._sorted_dates
+
+        # the values read by the accessors don't invalidate the sorted dates
+        self.assertEqual(len(new_serie.get_dates), 20)
+        self.assertEqual(new_serie.start_date, self.dates[0])
+        self.assertEqual(new_serie.end_date, self.dates[19])
+        self.assertEqual(len(new_serie.get_data_between(self.dates[5], self.dates[14])), 10)
+        self.assertIs(new_serie._sorted_dates, sorted_dates)
+        new_serie.set_time_serie_values(self.dates[20:30], self.vals[20:30])
+        self.assertEqual(len(new_serie._sorted_dates), 3)
+
+        # the Series handed out can be modified, so its dates are checked again
+        new_serie.value.loc[self.dates[40]] = 1.
+        self.assertIsNone(new_serie._sorted_dates)
+        with self.assertWarns(UserWarning):
+            new_serie.set_time_serie_values(self.dates[40:41], self.vals[40:41])
+
+    def test_regular_time_index(self):
+        time_index = RegularTimeIndex.from_dates(self.dates)
+        self.assertEqual(len(time_index), 50)
+        self.assertTrue(time_index.to_index().equals(self.dates))
+        self.assertEqual(time_index.get_loc(self.dates[7]), 7)
+        self.assertEqual(time_index.slice_between(self.dates[2] - datetime.timedelta(minutes=1),
+                                                  self.dates[4]), slice(2, 5))
+        self.assertEqual(time_index[2:5].start, self.dates[2])
+        self.assertIsNone(RegularTimeIndex.from_dates(self.dates[[0, 1, 3]]))
+        self.assertIsNone(RegularTimeIndex.from_dates(self.dates[::-1]))
+
+    def test_start_and_end_dates(self):
+        self.assertEqual(self.ts.start_date, self.dates[0])
+        self.assertEqual(self.ts.end_date, self.dates[-1])
+        irregular_dates = self.dates[[0, 1, 3, 10]]
+        irregular_serie = TimeSeriesRecords(irregular_dates, self.vals[:4])
+        self.assertEqual(irregular_serie.end_date, self.dates[10])
+        self.assertTrue(irregular_serie.get_data_between(self.dates[1], self.dates[5]).equals(
+            pd.Series(self.vals[1:3], irregular_dates[1:3])))
+
     def test_get_one_record_by_date(self):
         self.assertEqual(len([self.ts.get_data_at_time(datetime.datetime(2011, 2, 2))]), 1)
         with self.assertRaises(KeyError) as context: